@@ -0,0 +1,31 @@
+"""Add provider (enabled, priority) index
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-10-05 10:00:00
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Add index serving the load balancer's healthy-provider query."""
+    
+    # Filters enabled = true and orders by priority; the composite index
+    # lets the database read rows in priority order instead of sorting
+    with op.batch_alter_table('providers', schema=None) as batch_op:
+        batch_op.create_index(
+            'idx_provider_enabled_priority', ['enabled', 'priority'], unique=False
+        )
+
+
+def downgrade() -> None:
+    """Remove provider (enabled, priority) index."""
+    
+    with op.batch_alter_table('providers', schema=None) as batch_op:
+        batch_op.drop_index('idx_provider_enabled_priority')
@@ -6,7 +6,7 @@ from fastapi import Depends, Header, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
-from app.core.cache import RedisCache
+from app.core.cache import RedisCache, cache
 from app.core.config import settings
 from app.core.logger import get_logger
 
@@ -28,8 +28,13 @@ async def get_database() -> AsyncGenerator[AsyncSession, None]:
 # ============================================================================
 
 async def get_cache() -> RedisCache:
-    """Get Redis cache dependency."""
-    return RedisCache()
+    """
+    Get Redis cache dependency.
+    
+    Returns the process-wide cache connected in the application lifespan;
+    a fresh ``RedisCache()`` is never connected and silently no-ops.
+    """
+    return cache
 
 
 # ============================================================================
@@ -33,6 +33,8 @@ from app.core.logger import get_logger
 from app.models.provider import Provider, ModelConfig
 from app.models.request_log import RequestLog
 from app.models.health import ProviderHealth, ProviderStats as DBProviderStats
+from app.services.balancer import LoadBalancer
+from app.services.router import RequestRouter
 
 logger = get_logger(__name__)
 
@@ -121,6 +123,9 @@ async def create_provider(
         
         # Invalidate cache
         await cache.delete("providers:*")
+        await cache.clear("provider:snapshot:*")
+        RequestRouter.invalidate_provider_cache()
+        await LoadBalancer.notify_providers_changed(cache)
         
         logger.info(f"Provider created: {provider.name} (ID: {provider.id})")
         return provider
@@ -206,6 +211,9 @@ async def update_provider(
         
         # Invalidate cache
         await cache.delete("providers:*")
+        await cache.clear("provider:snapshot:*")
+        RequestRouter.invalidate_provider_cache()
+        await LoadBalancer.notify_providers_changed(cache)
         
         logger.info(f"Provider updated: {provider.name} (ID: {provider.id})")
         return provider
@@ -251,6 +259,9 @@ async def delete_provider(
         
         # Invalidate cache
         await cache.delete("providers:*")
+        await cache.clear("provider:snapshot:*")
+        RequestRouter.invalidate_provider_cache()
+        await LoadBalancer.notify_providers_changed(cache)
         
         logger.info(f"Provider deleted: {provider.name} (ID: {provider_id})")
     
@@ -293,14 +304,15 @@ async def get_provider_models(
                 detail=f"Provider {provider_id} not found"
             )
         
-        # Get provider instance
+        # Get shared provider instance (reuses pooled connections)
         from app.providers.factory import ProviderFactory
         
-        provider_factory = ProviderFactory()
-        provider_instance = provider_factory.create_provider(
+        provider_instance = await ProviderFactory.get_provider(
+            provider_id=provider.id,
             provider_type=provider.type,
             api_key=provider.api_key,
-            base_url=provider.base_url
+            base_url=provider.base_url,
+            timeout=provider.timeout
         )
         
         # Get models
@@ -349,14 +361,15 @@ async def import_provider_models(
                 detail=f"Provider {provider_id} not found"
             )
         
-        # Get provider instance
+        # Get shared provider instance (reuses pooled connections)
         from app.providers.factory import ProviderFactory
         
-        provider_factory = ProviderFactory()
-        provider_instance = provider_factory.create_provider(
+        provider_instance = await ProviderFactory.get_provider(
+            provider_id=provider.id,
             provider_type=provider.type,
             api_key=provider.api_key,
-            base_url=provider.base_url
+            base_url=provider.base_url,
+            timeout=provider.timeout
         )
         
         # Get all models
@@ -1088,6 +1101,7 @@ async def create_model_provider(
         
         # Invalidate cache
         await cache.delete("model-providers:*")
+        await LoadBalancer.notify_providers_changed(cache)
         
         logger.info(f"Model-provider association created: ID {association.id}")
         
@@ -1153,6 +1167,7 @@ async def update_model_provider(
         
         # Invalidate cache
         await cache.delete("model-providers:*")
+        await LoadBalancer.notify_providers_changed(cache)
         
         logger.info(f"Model-provider association updated: ID {association.id}")
         
@@ -1213,6 +1228,7 @@ async def delete_model_provider(
         
         # Invalidate cache
         await cache.delete("model-providers:*")
+        await LoadBalancer.notify_providers_changed(cache)
         
         logger.info(f"Model-provider association deleted: ID {association_id}")
     
@@ -1408,6 +1424,9 @@ async def import_configuration(
         
         # Invalidate all caches
         await cache.delete("providers:*")
+        await cache.clear("provider:snapshot:*")
+        RequestRouter.invalidate_provider_cache()
+        await LoadBalancer.notify_providers_changed(cache)
         await cache.delete("models:*")
         await cache.delete("model-providers:*")
         
@@ -1463,6 +1482,9 @@ async def import_configuration_upload(
         
         # Invalidate all caches
         await cache.delete("providers:*")
+        await cache.clear("provider:snapshot:*")
+        RequestRouter.invalidate_provider_cache()
+        await LoadBalancer.notify_providers_changed(cache)
         await cache.delete("models:*")
         await cache.delete("model-providers:*")
         
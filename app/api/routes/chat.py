@@ -3,11 +3,13 @@ Chat completion API routes (OpenAI compatible).
 """
 import time
 import uuid
-import json
-from typing import Optional
+from typing import Dict, Iterable, List, Optional
+
+import orjson
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.dependencies import (
@@ -27,16 +29,210 @@ from app.api.schemas import (
     ErrorDetail
 )
 from app.core.cache import RedisCache
+from app.core.database import AsyncSessionLocal
 from app.core.logger import get_logger
-from app.services.router import RequestRouter
+from app.services.router import RequestRouter, AllProvidersFailedError
 from app.services.balancer import LoadBalancer
 from app.services.token_estimator import TokenEstimator
-from app.models.request_log import RequestLog
+from app.services.log_writer import log_writer
+from app.models.provider import Provider
 
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="/v1/chat", tags=["chat"])
 
+# SSE prefixes used when inspecting a finished stream
+SSE_DATA_PREFIX = b"data: "
+SSE_DONE = b"data: [DONE]"
+
+# Final chunks of a stream searched for usage (usage is sent last)
+STREAM_TAIL_CHUNKS = 4
+
+
+def _data_frames(chunk: bytes) -> List[bytes]:
+    """
+    Split a streamed chunk into its SSE data frames.
+    
+    Providers forward every event from one network read as a single chunk,
+    so a chunk may hold several ``data: ...`` frames.
+    
+    Args:
+        chunk: Streamed chunk
+        
+    Returns:
+        Data frames other than ``[DONE]``, prefix included
+    """
+    return [
+        frame for frame in chunk.split(b"\n\n")
+        if frame.startswith(SSE_DATA_PREFIX) and not frame.startswith(SSE_DONE)
+    ]
+
+
+def _find_usage_chunk(chunks: Iterable[bytes]) -> Optional[bytes]:
+    """
+    Find the last SSE data frame that carries usage info.
+    
+    Providers send usage in one of the final frames, so the scan runs
+    backwards and usually stops after a chunk or two.
+    
+    Args:
+        chunks: Final streamed chunks in order
+        
+    Returns:
+        The usage frame, or None if the provider sent none
+    """
+    for chunk in reversed(chunks):
+        if b'"usage"' not in chunk:
+            continue
+        for frame in reversed(_data_frames(chunk)):
+            if b'"usage"' in frame:
+                return frame
+    return None
+
+
+def _accumulate_stream_content(chunks: Iterable[bytes]) -> str:
+    """
+    Extract the delta content from SSE chunks.
+    
+    Args:
+        chunks: Streamed chunks in order
+        
+    Returns:
+        Concatenated delta content
+    """
+    parts = []
+    for chunk in chunks:
+        if b'"content"' not in chunk:
+            continue
+        for frame in _data_frames(chunk):
+            try:
+                data = orjson.loads(frame[6:])
+                choices = data.get("choices")
+                if choices:
+                    content = choices[0].get("delta", {}).get("content")
+                    if content:
+                        parts.append(content)
+            except Exception:
+                pass
+    return "".join(parts)
+
+
+def _stream_usage(
+    chunks: List[bytes],
+    request: ChatCompletionRequest
+) -> Optional[Dict[str, int]]:
+    """
+    Get token usage for a finished stream.
+    
+    Uses the usage the provider reported, or estimates it from the
+    request messages and the streamed content. The content is only
+    extracted when the provider sent no usage.
+    
+    Args:
+        chunks: Streamed chunks in order
+        request: Original chat completion request
+        
+    Returns:
+        Usage dictionary, or None if the stream was empty or unparseable
+    """
+    if not chunks:
+        return None
+    
+    usage_chunk = None
+    try:
+        data = {}
+        usage_chunk = _find_usage_chunk(chunks[-STREAM_TAIL_CHUNKS:])
+        if usage_chunk:
+            data = orjson.loads(usage_chunk[6:])
+        if "usage" in data and data["usage"] and data["usage"].get("total_tokens", 0) > 0:
+            # Provider returned usage info
+            usage_info = data["usage"]
+            logger.info(
+                f"Extracted usage from provider: prompt={usage_info.get('prompt_tokens')}, "
+                f"completion={usage_info.get('completion_tokens')}, "
+                f"total={usage_info.get('total_tokens')}"
+            )
+            return usage_info
+        
+        # Provider doesn't support usage tracking, estimate tokens
+        logger.warning(f"Provider doesn't return usage info, estimating tokens")
+        
+        content = _accumulate_stream_content(chunks)
+        prompt_tokens = TokenEstimator.estimate_messages_tokens(request.messages)
+        completion_tokens = TokenEstimator.estimate_completion_tokens(content)
+        total_tokens = prompt_tokens + completion_tokens
+        
+        logger.info(
+            f"Estimated usage: prompt={prompt_tokens}, "
+            f"completion={completion_tokens}, "
+            f"total={total_tokens} (content_length={len(content)})"
+        )
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": total_tokens
+        }
+    except Exception as e:
+        logger.error(f"Failed to extract/estimate usage: {str(e)}, chunk: {usage_chunk[:200] if usage_chunk else 'None'}")
+        return None
+
+
+async def _log_streaming_request(
+    chunks: List[bytes],
+    provider_name: str,
+    request: ChatCompletionRequest,
+    latency_ms: int,
+    api_key: Optional[str],
+    client_ip: Optional[str]
+) -> None:
+    """
+    Work out usage for a finished stream and queue its request log.
+    
+    Runs as a background task after the response has been sent, so it
+    uses its own database session.
+    
+    Args:
+        chunks: Streamed chunks in order
+        provider_name: Provider that served the stream
+        request: Original chat completion request
+        latency_ms: Stream duration in milliseconds
+        api_key: User API key
+        client_ip: Client IP address
+    """
+    try:
+        async with AsyncSessionLocal() as session:
+            query = select(Provider.id).where(
+                Provider.name == provider_name,
+                Provider.enabled == True
+            )
+            provider_id = (await session.execute(query)).scalar_one_or_none()
+        
+        if provider_id is None:
+            return
+        
+        usage_info = _stream_usage(chunks, request)
+        
+        log_entry = dict(
+            provider_id=provider_id,
+            model=request.model,
+            endpoint="/v1/chat/completions",
+            method="POST",
+            status_code=200,
+            prompt_tokens=usage_info.get("prompt_tokens") if usage_info else None,
+            completion_tokens=usage_info.get("completion_tokens") if usage_info else None,
+            total_tokens=usage_info.get("total_tokens") if usage_info else None,
+            latency_ms=latency_ms,
+            user_id=api_key,
+            ip_address=client_ip
+        )
+        log_writer.enqueue(log_entry)
+        
+        logger.info(
+            f"Streaming logged: tokens={usage_info.get('total_tokens') if usage_info else 0}"
+        )
+    except Exception as e:
+        logger.error(f"Failed to log streaming request: {str(e)}")
+
 
 # ============================================================================
 # Chat Completion Endpoint
@@ -116,10 +312,9 @@ async def create_chat_completion(
         if request.stream:
             # Handle streaming response with state tracking
             stream_state = {
-                "last_chunk": None,
+                "chunks": [],
                 "provider": None,
-                "start_time": start_time,
-                "accumulated_content": ""
+                "start_time": start_time
             }
             
             async def tracked_stream():
@@ -132,98 +327,22 @@ async def create_chat_completion(
                         api_key=api_key,
                         client_ip=client_ip
                     ):
-                        # Track last chunk and accumulate content
-                        if chunk.startswith("data: ") and not chunk.startswith("data: [DONE]"):
-                            stream_state["last_chunk"] = chunk
-                            # Extract content for token estimation
-                            try:
-                                data_str = chunk[6:].strip()
-                                data = json.loads(data_str)
-                                if "choices" in data and len(data["choices"]) > 0:
-                                    delta = data["choices"][0].get("delta", {})
-                                    content = delta.get("content", "")
-                                    if content:
-                                        stream_state["accumulated_content"] += content
-                            except:
-                                pass
+                        # Forward unchanged; chunks are only parsed once the
+                        # stream ends
+                        stream_state["chunks"].append(chunk)
                         yield chunk
                 finally:
-                    # Log after stream completes
-                    from app.services.router import RequestRouter
-                    from app.models.provider import Provider
-                    from sqlalchemy import select
-                    
-                    try:
-                        # Get provider info
-                        query = select(Provider).where(Provider.name == provider_name, Provider.enabled == True)
-                        result = await db.execute(query)
-                        provider = result.scalar_one_or_none()
-                        
-                        if provider:
-                            # Extract usage from last chunk or estimate
-                            usage_info = None
-                            if stream_state["last_chunk"]:
-                                try:
-                                    data_str = stream_state["last_chunk"][6:].strip()
-                                    data = json.loads(data_str)
-                                    if "usage" in data and data["usage"] and data["usage"].get("total_tokens", 0) > 0:
-                                        # Provider returned usage info
-                                        usage_info = data["usage"]
-                                        logger.info(
-                                            f"Extracted usage from provider: prompt={usage_info.get('prompt_tokens')}, "
-                                            f"completion={usage_info.get('completion_tokens')}, "
-                                            f"total={usage_info.get('total_tokens')}"
-                                        )
-                                    else:
-                                        # Provider doesn't support usage tracking, estimate tokens
-                                        logger.warning(f"Provider doesn't return usage info, estimating tokens")
-                                        
-                                        # Estimate tokens
-                                        prompt_tokens = TokenEstimator.estimate_messages_tokens(request.messages)
-                                        completion_tokens = TokenEstimator.estimate_completion_tokens(
-                                            stream_state["accumulated_content"]
-                                        )
-                                        total_tokens = prompt_tokens + completion_tokens
-                                        
-                                        usage_info = {
-                                            "prompt_tokens": prompt_tokens,
-                                            "completion_tokens": completion_tokens,
-                                            "total_tokens": total_tokens
-                                        }
-                                        
-                                        logger.info(
-                                            f"Estimated usage: prompt={prompt_tokens}, "
-                                            f"completion={completion_tokens}, "
-                                            f"total={total_tokens} (content_length={len(stream_state['accumulated_content'])})"
-                                        )
-                                except Exception as e:
-                                    logger.error(f"Failed to extract/estimate usage: {str(e)}, chunk: {stream_state['last_chunk'][:200] if stream_state['last_chunk'] else 'None'}")
-                            
-                            # Create log entry
-                            from app.models.request_log import RequestLog
-                            latency_ms = int((time.time() - stream_state["start_time"]) * 1000)
-                            log_entry = RequestLog(
-                                provider_id=provider.id,
-                                model=request.model,
-                                endpoint="/v1/chat/completions",
-                                method="POST",
-                                status_code=200,
-                                prompt_tokens=usage_info.get("prompt_tokens") if usage_info else None,
-                                completion_tokens=usage_info.get("completion_tokens") if usage_info else None,
-                                total_tokens=usage_info.get("total_tokens") if usage_info else None,
-                                latency_ms=latency_ms,
-                                user_id=api_key,
-                                ip_address=client_ip
-                            )
-                            db.add(log_entry)
-                            await db.commit()
-                            
-                            logger.info(
-                                f"Streaming logged: tokens={usage_info.get('total_tokens') if usage_info else 0}"
-                            )
-                    except Exception as e:
-                        logger.error(f"Failed to log streaming request: {str(e)}")
-                        await db.rollback()
+                    # Usage parsing and logging run in the background so the
+                    # response can close as soon as the last chunk is sent
+                    latency_ms = int((time.time() - stream_state["start_time"]) * 1000)
+                    log_writer.submit(_log_streaming_request(
+                        chunks=stream_state["chunks"],
+                        provider_name=provider_name,
+                        request=request,
+                        latency_ms=latency_ms,
+                        api_key=api_key,
+                        client_ip=client_ip
+                    ))
             
             return StreamingResponse(
                 tracked_stream(),
@@ -266,19 +385,22 @@ async def create_chat_completion(
         raise
     
     except Exception as e:
+        extra = {
+            "request_id": request_id,
+            "error": str(e),
+            "model": request.model
+        }
+        if isinstance(e, AllProvidersFailedError):
+            extra["providers_tried"] = [name for name, _ in e.errors]
         logger.error(
             f"Chat completion failed: {str(e)}",
-            extra={
-                "request_id": request_id,
-                "error": str(e),
-                "model": request.model
-            },
+            extra=extra,
             exc_info=True
         )
         
         # Log failed request
         try:
-            log_entry = RequestLog(
+            log_entry = dict(
                 provider_id=None,
                 model=request.model,
                 endpoint="/v1/chat/completions",
@@ -289,8 +411,7 @@ async def create_chat_completion(
                 ip_address=client_ip,
                 latency_ms=int((time.time() - start_time) * 1000)
             )
-            db.add(log_entry)
-            await db.commit()
+            log_writer.enqueue(log_entry)
         except Exception as log_error:
             logger.error(f"Failed to log request: {str(log_error)}")
         
@@ -9,7 +9,7 @@ from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.dependencies import get_database, verify_admin_key
-from app.services.excel_service import ExcelService
+from app.services.excel_service import ExcelService, write_sheets
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -209,25 +209,13 @@ async def import_models(
 )
 async def download_provider_template():
     """下载提供商导入模板"""
-    import pandas as pd
-    
     # 创建模板
-    template_data = [{
-        '名称': 'example-provider',
-        '类型': 'openai',
-        'API密钥': 'sk-xxx',
-        '基础URL': 'https://api.openai.com/v1',
-        '优先级': 100,
-        '启用状态': '是'
-    }]
-    
-    df = pd.DataFrame(template_data)
-    
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='提供商模板', index=False)
-    
-    output.seek(0)
+    output = write_sheets({
+        '提供商模板': [
+            ['名称', '类型', 'API密钥', '基础URL', '优先级', '启用状态'],
+            ['example-provider', 'openai', 'sk-xxx', 'https://api.openai.com/v1', 100, '是']
+        ]
+    })
     
     return StreamingResponse(
         output,
@@ -244,28 +232,14 @@ async def download_provider_template():
 )
 async def download_model_template():
     """下载模型配置导入模板"""
-    import pandas as pd
-    
     # 创建模板
-    template_data = [{
-        '模型名称': 'gpt-3.5-turbo',
-        '显示名称': 'GPT-3.5 Turbo',
-        '上下文长度': 4096,
-        '最大Tokens': 4096,
-        '输入成本(每百万)': 0.5,
-        '输出成本(每百万)': 1.5,
-        '支持流式': '是',
-        '支持函数': '是',
-        '支持视觉': '否'
-    }]
-    
-    df = pd.DataFrame(template_data)
-    
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='模型配置模板', index=False)
-    
-    output.seek(0)
+    output = write_sheets({
+        '模型配置模板': [
+            ['模型名称', '显示名称', '上下文长度', '最大Tokens', '输入成本(每百万)',
+             '输出成本(每百万)', '支持流式', '支持函数', '支持视觉'],
+            ['gpt-3.5-turbo', 'GPT-3.5 Turbo', 4096, 4096, 0.5, 1.5, '是', '是', '否']
+        ]
+    })
     
     return StreamingResponse(
         output,
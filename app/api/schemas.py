@@ -87,6 +87,12 @@ class ChatCompletionRequest(BaseModel):
         default=None,
         description="Ordered list of fallback providers"
     )
+    hedge_ms: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="Also start the first fallback provider if the primary "
+                    "has not answered within this many milliseconds"
+    )
     timeout: Optional[int] = Field(
         default=None,
         ge=1,
@@ -1,8 +1,8 @@
 """
 Redis cache management for configuration and health status caching.
 """
-from typing import Optional, Any
-import json
+from typing import List, Optional, Any
+import orjson
 from redis import asyncio as aioredis
 from redis.exceptions import RedisError
 
@@ -17,6 +17,8 @@ class RedisCache:
     
     def __init__(self):
         self.redis: Optional[aioredis.Redis] = None
+        # Binary client (no response decoding) for pre-encoded payloads
+        self.redis_raw: Optional[aioredis.Redis] = None
         self.enabled = settings.redis_enabled
         
     async def connect(self) -> None:
@@ -32,6 +34,11 @@ class RedisCache:
                 decode_responses=True,
                 max_connections=10
             )
+            self.redis_raw = aioredis.from_url(
+                settings.redis_url,
+                decode_responses=False,
+                max_connections=10
+            )
             # Test connection
             await self.redis.ping()
             logger.info("Redis cache connected successfully", url=settings.redis_url)
@@ -39,12 +46,15 @@ class RedisCache:
             logger.error("Failed to connect to Redis", error=str(e))
             self.enabled = False
             self.redis = None
+            self.redis_raw = None
     
     async def disconnect(self) -> None:
         """Close Redis connection."""
         if self.redis:
             await self.redis.close()
             logger.info("Redis cache disconnected")
+        if self.redis_raw:
+            await self.redis_raw.close()
     
     async def get(self, key: str) -> Optional[Any]:
         """
@@ -62,7 +72,7 @@ class RedisCache:
         try:
             value = await self.redis.get(key)
             if value:
-                return json.loads(value)
+                return orjson.loads(value)
             return None
         except RedisError as e:
             logger.warning("Redis get failed", key=key, error=str(e))
@@ -93,13 +103,59 @@ class RedisCache:
             await self.redis.setex(
                 key,
                 ttl,
-                json.dumps(value)
+                orjson.dumps(value)
             )
             return True
         except RedisError as e:
             logger.warning("Redis set failed", key=key, error=str(e))
             return False
     
+    async def get_bytes(self, key: str) -> Optional[bytes]:
+        """
+        Get raw bytes from cache (caller handles decoding).
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Cached bytes or None if not found
+        """
+        if not self.enabled or not self.redis_raw:
+            return None
+            
+        try:
+            return await self.redis_raw.get(key)
+        except RedisError as e:
+            logger.warning("Redis get failed", key=key, error=str(e))
+            return None
+    
+    async def set_bytes(
+        self,
+        key: str,
+        value: bytes,
+        ttl: Optional[int] = None
+    ) -> bool:
+        """
+        Set raw bytes in cache (caller handles encoding).
+        
+        Args:
+            key: Cache key
+            value: Encoded value
+            ttl: Time to live in seconds (default from settings)
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.enabled or not self.redis_raw:
+            return False
+            
+        try:
+            await self.redis_raw.setex(key, ttl or settings.redis_cache_ttl, value)
+            return True
+        except RedisError as e:
+            logger.warning("Redis set failed", key=key, error=str(e))
+            return False
+    
     async def delete(self, key: str) -> bool:
         """
         Delete key from cache.
@@ -162,13 +218,83 @@ class RedisCache:
             logger.warning("Redis exists check failed", key=key, error=str(e))
             return False
     
-    async def increment(self, key: str, amount: int = 1) -> Optional[int]:
+    async def exists_many(self, *keys: str) -> List[bool]:
+        """
+        Check which of several keys exist in one round trip.
+        
+        Args:
+            *keys: Cache keys
+            
+        Returns:
+            Existence flag per key (all False if cache is unavailable)
+        """
+        if not self.enabled or not self.redis:
+            return [False] * len(keys)
+        
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.exists(key)
+                return [count > 0 for count in await pipe.execute()]
+        except RedisError as e:
+            logger.warning("Redis exists check failed", keys=keys, error=str(e))
+            return [False] * len(keys)
+    
+    async def publish(self, channel: str, message: str) -> bool:
+        """
+        Publish message to a pub/sub channel.
+        
+        Args:
+            channel: Channel name
+            message: Message payload
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.enabled or not self.redis:
+            return False
+            
+        try:
+            await self.redis.publish(channel, message)
+            return True
+        except RedisError as e:
+            logger.warning("Redis publish failed", channel=channel, error=str(e))
+            return False
+    
+    async def subscribe(self, channel: str) -> Optional[aioredis.client.PubSub]:
+        """
+        Subscribe to a pub/sub channel.
+        
+        Args:
+            channel: Channel name
+            
+        Returns:
+            PubSub handle, or None if cache is unavailable
+        """
+        if not self.enabled or not self.redis:
+            return None
+            
+        try:
+            pubsub = self.redis.pubsub()
+            await pubsub.subscribe(channel)
+            return pubsub
+        except RedisError as e:
+            logger.warning("Redis subscribe failed", channel=channel, error=str(e))
+            return None
+    
+    async def increment(
+        self,
+        key: str,
+        amount: int = 1,
+        ttl: Optional[int] = None
+    ) -> Optional[int]:
         """
         Increment value of key by amount.
         
         Args:
             key: Cache key
             amount: Amount to increment by (default: 1)
+            ttl: Expiry in seconds, set when the key is created (optional)
             
         Returns:
             New value after increment, or None if failed
@@ -177,7 +303,10 @@ class RedisCache:
             return None
             
         try:
-            return await self.redis.incrby(key, amount)
+            value = await self.redis.incrby(key, amount)
+            if ttl and value == amount:
+                await self.redis.expire(key, ttl)
+            return value
         except RedisError as e:
             logger.warning("Redis increment failed", key=key, error=str(e))
             return None
@@ -193,6 +322,21 @@ def provider_cache_key(model_name: str) -> str:
     return f"provider:model:{model_name}"
 
 
+def provider_snapshot_cache_key(provider_name: str) -> str:
+    """Generate cache key for an enabled provider's connection settings."""
+    return f"provider:snapshot:{provider_name}"
+
+
+def circuit_open_cache_key(provider_name: str) -> str:
+    """Generate cache key marking a provider's circuit breaker as open."""
+    return f"cb:open:{provider_name}"
+
+
+def circuit_failures_cache_key(provider_name: str) -> str:
+    """Generate cache key for a provider's recent failure count."""
+    return f"cb:fail:{provider_name}"
+
+
 def health_cache_key(provider_id: int) -> str:
     """Generate cache key for provider health status."""
     return f"health:provider:{provider_id}"
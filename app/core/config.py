@@ -43,15 +43,27 @@ class Settings(BaseSettings):
     log_level: str = Field(default="INFO", alias="LOG_LEVEL")
     log_file: str = Field(default="./logs/app.log", alias="LOG_FILE")
     log_format: Literal["json", "text"] = Field(default="json", alias="LOG_FORMAT")
+    log_cleanup_batch_size: int = Field(default=10000, alias="LOG_CLEANUP_BATCH_SIZE")
     
     # Health Check Configuration
     health_check_enabled: bool = Field(default=True, alias="HEALTH_CHECK_ENABLED")
     health_check_interval: int = Field(default=300, alias="HEALTH_CHECK_INTERVAL")
     health_check_max_errors: int = Field(default=5, alias="HEALTH_CHECK_MAX_ERRORS")
     health_check_retry_hours: int = Field(default=1, alias="HEALTH_CHECK_RETRY_HOURS")
+    health_check_concurrency: int = Field(default=10, alias="HEALTH_CHECK_CONCURRENCY")
+    health_check_timeout: int = Field(default=30, alias="HEALTH_CHECK_TIMEOUT")
     
     # Request Configuration
     max_retry_count: int = Field(default=3, alias="MAX_RETRY_COUNT")
+    retry_base_delay: float = Field(default=1.0, alias="RETRY_BASE_DELAY")
+    retry_max_delay: float = Field(default=30.0, alias="RETRY_MAX_DELAY")
+    retry_jitter: float = Field(default=0.5, alias="RETRY_JITTER")
+    circuit_breaker_threshold: int = Field(default=5, alias="CIRCUIT_BREAKER_THRESHOLD")
+    circuit_breaker_window: int = Field(default=60, alias="CIRCUIT_BREAKER_WINDOW")
+    circuit_breaker_cooldown: int = Field(default=30, alias="CIRCUIT_BREAKER_COOLDOWN")
+    balancer_strategy: Literal["weighted_random", "smooth_wrr"] = Field(
+        default="weighted_random", alias="BALANCER_STRATEGY"
+    )
     request_timeout: int = Field(default=30, alias="REQUEST_TIMEOUT")
     response_timeout: int = Field(default=300, alias="RESPONSE_TIMEOUT")
     
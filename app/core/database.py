@@ -7,8 +7,9 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker
 )
+from sqlalchemy import event
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.pool import NullPool, QueuePool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
 
 from app.core.config import settings
 
@@ -17,19 +18,38 @@ Base = declarative_base()
 
 # Create async engine based on database type
 if settings.database_type == "sqlite":
-    # SQLite specific configuration
+    # SQLite specific configuration. Pooled connections stay open, so
+    # sessions (e.g. the request log writer) skip the file open and PRAGMA
+    # setup; an in-memory database must share a single connection.
+    if ":memory:" in settings.database_url:
+        pool_args = {"poolclass": StaticPool}
+    else:
+        pool_args = {
+            "poolclass": AsyncAdaptedQueuePool,
+            "pool_size": 10,
+            "max_overflow": 5,
+            "pool_pre_ping": False,
+        }
     engine = create_async_engine(
         settings.database_url,
         echo=settings.app_debug,
-        poolclass=NullPool,  # SQLite doesn't support connection pooling well
-        connect_args={"check_same_thread": False}
+        connect_args={"check_same_thread": False},
+        **pool_args
     )
+    
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Enable WAL once per new connection (readers don't block the writer)."""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
 else:
     # MySQL/PostgreSQL configuration with connection pooling
     engine = create_async_engine(
         settings.database_url,
         echo=settings.app_debug,
-        poolclass=QueuePool,
+        poolclass=AsyncAdaptedQueuePool,
         pool_size=10,
         max_overflow=20,
         pool_pre_ping=True,  # Verify connections before using
@@ -5,6 +5,7 @@ import sys
 import logging
 from pathlib import Path
 from typing import Any
+import orjson
 import structlog
 from structlog.types import EventDict, Processor
 
@@ -18,6 +19,11 @@ def add_app_context(logger: Any, method_name: str, event_dict: EventDict) -> Eve
     return event_dict
 
 
+def orjson_dumps(obj: Any, **kwargs: Any) -> str:
+    """Serialize a log event with orjson (JSONRenderer expects str)."""
+    return orjson.dumps(obj, default=kwargs.get("default")).decode()
+
+
 def setup_logging() -> None:
     """
     Configure structured logging with structlog.
@@ -39,6 +45,8 @@ def setup_logging() -> None:
     
     # Structlog processors
     processors: list[Processor] = [
+        # Drop events below the configured level before any other processing
+        structlog.stdlib.filter_by_level,
         structlog.contextvars.merge_contextvars,
         structlog.stdlib.add_logger_name,
         structlog.stdlib.add_log_level,
@@ -52,7 +60,7 @@ def setup_logging() -> None:
     if settings.log_format == "json":
         processors.extend([
             structlog.processors.format_exc_info,
-            structlog.processors.JSONRenderer()
+            structlog.processors.JSONRenderer(serializer=orjson_dumps)
         ])
     else:
         processors.extend([
@@ -17,6 +17,10 @@ from app.api.routes import chat, models, admin, excel
 
 logger = get_logger(__name__)
 
+# Seconds a stopped periodic service gets to finish its current run
+# before it is cancelled on shutdown
+SERVICE_STOP_TIMEOUT = 10
+
 
 # ============================================================================
 # Application Lifespan
@@ -46,6 +50,18 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     import asyncio
     background_tasks = []
     
+    # Connect shared cache and listen for load balancer invalidations
+    from app.core.cache import cache
+    from app.services.balancer import listen_for_invalidations
+    await cache.connect()
+    invalidation_task = asyncio.create_task(listen_for_invalidations(cache))
+    background_tasks.append(("balancer_invalidation", invalidation_task))
+    
+    # Start request log writer
+    from app.services.log_writer import log_writer
+    log_writer_task = asyncio.create_task(log_writer.run())
+    background_tasks.append(("log_writer", log_writer_task))
+    
     # Start health check service
     if settings.health_check_enabled:
         from app.services.health_check import start_health_check_service
@@ -71,13 +87,36 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     # Shutdown
     logger.info("Shutting down LLM Orchestrator API")
     
-    # Cancel all background tasks
+    # Signal periodic services to stop and let them finish their current
+    # run; the other tasks only end when cancelled
+    from app.services.health_check import stop_health_check_service
+    from app.services.log_cleanup import stop_log_cleanup_service
+    stop_health_check_service()
+    stop_log_cleanup_service()
+    stoppable = {"health_check", "log_cleanup"}
+    
     for task_name, task in background_tasks:
-        task.cancel()
         try:
-            await task
+            if task_name in stoppable:
+                # Cancels the task if it does not stop in time
+                await asyncio.wait_for(task, timeout=SERVICE_STOP_TIMEOUT)
+            else:
+                task.cancel()
+                await task
         except asyncio.CancelledError:
-            logger.info(f"{task_name} service stopped")
+            pass
+        except asyncio.TimeoutError:
+            logger.warning(f"{task_name} service did not stop in time, cancelled")
+        except Exception as e:
+            # Keep shutting down so clients and connections still get closed
+            logger.error(f"{task_name} service failed: {str(e)}", exc_info=True)
+        logger.info(f"{task_name} service stopped")
+    
+    # Close pooled provider HTTP clients
+    from app.providers.factory import ProviderFactory
+    await ProviderFactory.close_all()
+    
+    await cache.disconnect()
 
 
 # ============================================================================
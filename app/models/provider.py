@@ -38,6 +38,7 @@ class Provider(Base):
     
     __table_args__ = (
         Index('idx_provider_type_enabled', 'type', 'enabled'),
+        Index('idx_provider_enabled_priority', 'enabled', 'priority'),
     )
 
 
@@ -2,10 +2,18 @@
 LLM provider implementations with unified interface.
 """
 from app.providers.base import BaseProvider, ProviderConfig
+from app.providers.exceptions import (
+    ProviderError,
+    ProviderRetryableError,
+    ProviderFatalError,
+)
 from app.providers.factory import ProviderFactory
 
 __all__ = [
     "BaseProvider",
     "ProviderConfig",
     "ProviderFactory",
+    "ProviderError",
+    "ProviderRetryableError",
+    "ProviderFatalError",
 ]
\ No newline at end of file
@@ -2,7 +2,7 @@
 Base provider abstract class and configuration.
 """
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any, AsyncGenerator
+from typing import Optional, Dict, Any, AsyncGenerator, List
 from dataclasses import dataclass
 import httpx
 
@@ -10,6 +10,39 @@ from app.core.logger import get_logger
 
 logger = get_logger(__name__)
 
+# SSE framing; streams stay bytes end to end (SSE is ASCII-framed UTF-8)
+SSE_DATA_PREFIX = b"data: "
+SSE_DONE = b"[DONE]"
+SSE_DONE_FRAME = b"data: [DONE]\n\n"
+
+
+async def iter_sse_data(response: httpx.Response) -> AsyncGenerator[List[bytes], None]:
+    """
+    Read SSE ``data:`` payloads from a streaming response, one batch per read.
+    
+    All complete events that arrived in the same network read are yielded
+    together, so callers can forward them as one chunk instead of paying a
+    generator round trip and an ASGI send per event. Payloads are not
+    decoded; ``orjson.loads`` accepts bytes directly.
+    
+    Args:
+        response: Streaming HTTP response
+        
+    Yields:
+        Non-empty data payloads (without the ``data: `` prefix)
+    """
+    pending = b""
+    async for raw in response.aiter_bytes():
+        lines = (pending + raw).split(b"\n")
+        pending = lines.pop()
+        batch = [line[6:].strip() for line in lines if line.startswith(SSE_DATA_PREFIX)]
+        batch = [data for data in batch if data]
+        if batch:
+            yield batch
+    
+    if pending.startswith(SSE_DATA_PREFIX) and pending[6:].strip():
+        yield [pending[6:].strip()]
+
 
 @dataclass
 class ProviderConfig:
@@ -73,6 +106,7 @@ class BaseProvider(ABC):
         if self._client is None:
             self._client = httpx.AsyncClient(
                 timeout=httpx.Timeout(self.config.timeout),
+                http2=True,
                 limits=httpx.Limits(
                     max_keepalive_connections=10,
                     max_connections=20,
@@ -107,7 +141,7 @@ class BaseProvider(ABC):
     async def chat_completion_stream(
         self,
         request: 'ChatCompletionRequest'
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncGenerator[bytes, None]:
         """
         Send streaming chat completion request.
         
@@ -115,7 +149,7 @@ class BaseProvider(ABC):
             request: Chat completion request object
             
         Yields:
-            Server-sent event chunks
+            Server-sent event chunks (UTF-8 encoded)
         """
         pass
     
@@ -139,6 +173,23 @@ class BaseProvider(ABC):
         """
         pass
     
+    def request_timeout(self, request: 'ChatCompletionRequest') -> Any:
+        """
+        Per-request timeout for an httpx call.
+        
+        The shared client is built with the provider's configured timeout;
+        a request-level ``timeout`` overrides it for that call only.
+        
+        Args:
+            request: Chat completion request object
+            
+        Returns:
+            ``httpx.Timeout`` for the override, or ``httpx.USE_CLIENT_DEFAULT``
+        """
+        if request.timeout:
+            return httpx.Timeout(request.timeout)
+        return httpx.USE_CLIENT_DEFAULT
+    
     def prepare_headers(self) -> Dict[str, str]:
         """
         Prepare common request headers.
@@ -0,0 +1,87 @@
+"""
+Provider error types with compact, bounded descriptions.
+"""
+import httpx
+
+# Longest reason kept on an error (and stored in request logs)
+MAX_REASON_LENGTH = 200
+
+# Upstream statuses that retrying the same request cannot fix
+# (bad request, auth, not found, validation)
+NON_RETRYABLE_STATUS_CODES = frozenset({400, 401, 403, 404, 422})
+
+
+class ProviderError(Exception):
+    """
+    Base error for a failed provider call.
+
+    Attributes:
+        code: Short machine-readable error code (e.g. ``http_503``, ``timeout``)
+        short_reason: Human-readable reason, truncated to ``MAX_REASON_LENGTH``
+    """
+
+    def __init__(self, code: str, reason: str):
+        self.code = code
+        self.short_reason = reason[:MAX_REASON_LENGTH]
+        super().__init__(f"{code}: {self.short_reason}")
+
+
+class ProviderRetryableError(ProviderError):
+    """Error that may succeed when the request is retried."""
+
+
+class ProviderFatalError(ProviderError):
+    """Error that would fail again on retry (bad request, auth, not found)."""
+
+
+class CircuitOpenError(ProviderRetryableError):
+    """Raised when a provider is skipped because its circuit breaker is open."""
+
+    def __init__(self, provider_name: str):
+        super().__init__("circuit_open", f"Circuit breaker open for provider {provider_name}")
+        self.provider_name = provider_name
+
+
+def to_provider_error(error: Exception) -> ProviderError:
+    """
+    Convert an exception raised by a provider call into a ProviderError.
+
+    Args:
+        error: Exception raised by the provider
+
+    Returns:
+        The error itself if already a ProviderError, otherwise a typed wrapper
+    """
+    if isinstance(error, ProviderError):
+        return error
+
+    if isinstance(error, httpx.HTTPStatusError):
+        status_code = error.response.status_code
+        error_class = (
+            ProviderFatalError if status_code in NON_RETRYABLE_STATUS_CODES
+            else ProviderRetryableError
+        )
+        return error_class(f"http_{status_code}", f"HTTP {status_code}")
+
+    if isinstance(error, httpx.TimeoutException):
+        return ProviderRetryableError("timeout", type(error).__name__)
+
+    if isinstance(error, httpx.RequestError):
+        return ProviderRetryableError("connection_error", type(error).__name__)
+
+    return ProviderRetryableError("provider_error", f"{type(error).__name__}: {error}")
+
+
+def error_reason(error: Exception) -> str:
+    """
+    Get a bounded description of an error for logs and error summaries.
+
+    Args:
+        error: Any exception
+
+    Returns:
+        ``short_reason`` for provider errors, otherwise the truncated message
+    """
+    if isinstance(error, ProviderError):
+        return error.short_reason
+    return str(error)[:MAX_REASON_LENGTH]
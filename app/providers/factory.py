@@ -1,7 +1,8 @@
 """
 Provider factory for creating provider instances.
 """
-from typing import Dict, Type
+from typing import Dict, Optional, Set, Tuple, Type
+import asyncio
 import json
 
 from app.providers.base import BaseProvider, ProviderConfig
@@ -12,6 +13,10 @@ from app.core.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Seconds a replaced provider instance stays open so requests and streams
+# already using its client can finish
+RETIRED_CLOSE_DELAY = 300
+
 
 class ProviderFactory:
     """Factory for creating provider instances."""
@@ -23,6 +28,15 @@ class ProviderFactory:
         "gemini": GeminiProvider,
     }
     
+    # Shared instances reused across requests so HTTP connections stay pooled,
+    # keyed by provider id with the (type, api_key, base_url, timeout) they
+    # were built from
+    _instances: Dict[int, Tuple[Tuple[str, str, Optional[str], int], BaseProvider]] = {}
+    
+    # Replaced instances waiting to be closed, with their pending close tasks
+    _retired: Set[BaseProvider] = set()
+    _retire_tasks: Set[asyncio.Task] = set()
+    
     @classmethod
     def create_provider(
         cls,
@@ -73,6 +87,93 @@ class ProviderFactory:
         
         return provider
     
+    @classmethod
+    async def get_provider(
+        cls,
+        provider_id: int,
+        provider_type: str,
+        api_key: str,
+        base_url: str = None,
+        timeout: int = 60
+    ) -> BaseProvider:
+        """
+        Get the shared instance for a provider, creating it on first use.
+        
+        There is one instance per provider id. When the provider's type,
+        API key, base URL or configured timeout changed since the instance
+        was built, a new one replaces it. The old client may still be
+        serving requests, so it is closed after ``RETIRED_CLOSE_DELAY``
+        seconds (or at shutdown) rather than straight away. Per-request
+        timeouts are applied per call, not per instance.
+        
+        Args:
+            provider_id: Provider database id
+            provider_type: Provider type (openai, anthropic, gemini)
+            api_key: API key for the provider
+            base_url: Optional base URL
+            timeout: Provider's configured timeout in seconds
+            
+        Returns:
+            Provider instance
+        """
+        config = (provider_type, api_key, base_url, timeout)
+        cached = cls._instances.get(provider_id)
+        if cached and cached[0] == config:
+            return cached[1]
+        
+        provider = cls.create_provider(
+            provider_type=provider_type,
+            api_key=api_key,
+            base_url=base_url,
+            timeout=timeout
+        )
+        cls._instances[provider_id] = (config, provider)
+        
+        if cached:
+            cls._retire(cached[1])
+        
+        return provider
+    
+    @classmethod
+    def _retire(cls, provider: BaseProvider) -> None:
+        """
+        Schedule a replaced instance to be closed once in-flight use is done.
+        
+        Args:
+            provider: Instance that is no longer handed out
+        """
+        cls._retired.add(provider)
+        task = asyncio.create_task(cls._close_retired(provider))
+        cls._retire_tasks.add(task)
+        task.add_done_callback(cls._retire_tasks.discard)
+    
+    @classmethod
+    async def _close_retired(cls, provider: BaseProvider) -> None:
+        """
+        Close a retired instance after the grace period.
+        
+        Args:
+            provider: Retired instance
+        """
+        await asyncio.sleep(RETIRED_CLOSE_DELAY)
+        if provider in cls._retired:
+            cls._retired.discard(provider)
+            await provider.close()
+    
+    @classmethod
+    async def close_all(cls) -> None:
+        """Close the HTTP clients of all shared and retired provider instances."""
+        for task in cls._retire_tasks:
+            task.cancel()
+        cls._retire_tasks.clear()
+        
+        instances = [provider for _, provider in cls._instances.values()]
+        instances.extend(cls._retired)
+        cls._instances.clear()
+        cls._retired.clear()
+        for provider in instances:
+            await provider.close()
+    
     @classmethod
     def create_provider_from_config(
         cls,
@@ -3,8 +3,16 @@ Google Gemini provider implementation.
 """
 from typing import AsyncGenerator, Dict, Any, Optional
 import httpx
+import orjson
 
-from app.providers.base import BaseProvider, ProviderConfig
+from app.providers.base import (
+    BaseProvider,
+    ProviderConfig,
+    iter_sse_data,
+    SSE_DATA_PREFIX,
+    SSE_DONE,
+    SSE_DONE_FRAME
+)
 from app.api.schemas import (
     ChatCompletionRequest,
     ChatCompletionResponse,
@@ -71,7 +79,8 @@ class GeminiProvider(BaseProvider):
         response = await client.post(
             url,
             json=gemini_request,
-            params=params
+            params=params,
+            timeout=self.request_timeout(request)
         )
         response.raise_for_status()
         data = response.json()
@@ -82,7 +91,7 @@ class GeminiProvider(BaseProvider):
     async def chat_completion_stream(
         self,
         request: ChatCompletionRequest
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncGenerator[bytes, None]:
         """
         Send streaming chat completion request to Gemini API.
         
@@ -108,32 +117,40 @@ class GeminiProvider(BaseProvider):
             "POST",
             url,
             json=gemini_request,
-            params=params
+            params=params,
+            timeout=self.request_timeout(request)
         ) as response:
-            response.raise_for_status()
+            status_code = response.status_code
+            if status_code >= 400:
+                raise httpx.HTTPStatusError(
+                    f"HTTP {status_code}", request=response.request, response=response
+                )
             
-            async for line in response.aiter_lines():
-                if not line or not line.startswith("data: "):
-                    continue
-                
-                # Remove "data: " prefix
-                data_str = line[6:]
+            # Forward all events from one network read as a single chunk
+            async for batch in iter_sse_data(response):
+                frames = []
+                done = False
+                for data_str in batch:
+                    if data_str == SSE_DONE:
+                        frames.append(SSE_DONE_FRAME)
+                        done = True
+                        break
+                    
+                    # Convert Gemini chunk to OpenAI format
+                    try:
+                        chunk_data = orjson.loads(data_str)
+                        openai_chunk = self._convert_stream_chunk(chunk_data, request.model)
+                        
+                        if openai_chunk:
+                            frames.append(SSE_DATA_PREFIX + orjson.dumps(openai_chunk) + b"\n\n")
+                    except Exception as e:
+                        logger.warning(f"Failed to parse stream chunk: {e}")
+                        continue
                 
-                if data_str == "[DONE]":
-                    yield "data: [DONE]\n\n"
+                if frames:
+                    yield b"".join(frames)
+                if done:
                     break
-                
-                # Convert Gemini chunk to OpenAI format
-                try:
-                    import json
-                    chunk_data = json.loads(data_str)
-                    openai_chunk = self._convert_stream_chunk(chunk_data, request.model)
-                    
-                    if openai_chunk:
-                        yield f"data: {json.dumps(openai_chunk)}\n\n"
-                except Exception as e:
-                    logger.warning(f"Failed to parse stream chunk: {e}")
-                    continue
     
     def _convert_to_gemini_format(
         self,
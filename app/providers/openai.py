@@ -2,10 +2,16 @@
 OpenAI provider implementation.
 """
 from typing import Dict, Any, AsyncGenerator, Optional
-import json
 import httpx
 
-from app.providers.base import BaseProvider, ProviderConfig
+from app.providers.base import (
+    BaseProvider,
+    ProviderConfig,
+    iter_sse_data,
+    SSE_DATA_PREFIX,
+    SSE_DONE,
+    SSE_DONE_FRAME
+)
 from app.api.schemas import ChatCompletionRequest, ChatCompletionResponse, ChatCompletionChoice, ChatMessage, Usage, MessageRole
 from app.core.logger import get_logger
 
@@ -90,12 +96,14 @@ class OpenAIProvider(BaseProvider):
             extra={"model": resolved_model, "has_tools": request.tools is not None}
         )
         
-        return await self._non_stream_response(client, url, headers, payload, request.model)
+        return await self._non_stream_response(
+            client, url, headers, payload, request.model, self.request_timeout(request)
+        )
     
     async def chat_completion_stream(
         self,
         request: ChatCompletionRequest
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncGenerator[bytes, None]:
         """
         Send streaming chat completion request to OpenAI.
         
@@ -149,7 +157,9 @@ class OpenAIProvider(BaseProvider):
         url = f"{self.base_url}/chat/completions"
         headers = self.prepare_headers()
         
-        async for chunk in self._stream_response(client, url, headers, payload):
+        async for chunk in self._stream_response(
+            client, url, headers, payload, self.request_timeout(request)
+        ):
             yield chunk
     
     async def _non_stream_response(
@@ -158,12 +168,17 @@ class OpenAIProvider(BaseProvider):
         url: str,
         headers: Dict[str, str],
         payload: Dict[str, Any],
-        original_model: str
+        original_model: str,
+        timeout: Any = httpx.USE_CLIENT_DEFAULT
     ) -> ChatCompletionResponse:
         """Handle non-streaming response."""
         try:
-            response = await client.post(url, json=payload, headers=headers)
-            response.raise_for_status()
+            response = await client.post(url, json=payload, headers=headers, timeout=timeout)
+            status_code = response.status_code
+            if status_code >= 400:
+                raise httpx.HTTPStatusError(
+                    f"HTTP {status_code}", request=response.request, response=response
+                )
             data = response.json()
             
             # Convert to ChatCompletionResponse
@@ -206,25 +221,32 @@ class OpenAIProvider(BaseProvider):
         client: httpx.AsyncClient,
         url: str,
         headers: Dict[str, str],
-        payload: Dict[str, Any]
-    ) -> AsyncGenerator[str, None]:
+        payload: Dict[str, Any],
+        timeout: Any = httpx.USE_CLIENT_DEFAULT
+    ) -> AsyncGenerator[bytes, None]:
         """Handle streaming response with robust SSE parsing."""
         try:
-            async with client.stream("POST", url, json=payload, headers=headers) as response:
-                response.raise_for_status()
-                async for line in response.aiter_lines():
-                    # Skip empty lines and comments
-                    if not line or line.startswith(":"):
-                        continue
-                    
-                    # Process SSE data lines
-                    if line.startswith("data: "):
-                        data = line[6:].strip()  # Remove "data: " prefix
-                        if data == "[DONE]":
-                            yield "data: [DONE]\n\n"
+            async with client.stream(
+                "POST", url, json=payload, headers=headers, timeout=timeout
+            ) as response:
+                status_code = response.status_code
+                if status_code >= 400:
+                    raise httpx.HTTPStatusError(
+                        f"HTTP {status_code}", request=response.request, response=response
+                    )
+                # Forward all events from one network read as a single chunk
+                async for batch in iter_sse_data(response):
+                    frames = []
+                    done = False
+                    for data in batch:
+                        if data == SSE_DONE:
+                            frames.append(SSE_DONE_FRAME)
+                            done = True
                             break
-                        if data:  # Only yield non-empty data
-                            yield f"data: {data}\n\n"
+                        frames.append(SSE_DATA_PREFIX + data + b"\n\n")
+                    yield b"".join(frames)
+                    if done:
+                        break
         except httpx.HTTPStatusError as e:
             logger.error(
                 "OpenAI streaming error",
@@ -0,0 +1,139 @@
+"""
+Alias table for O(1) weighted random selection (Vose's alias method).
+"""
+import random
+from array import array
+from typing import Any, Dict, List, Optional, Sequence
+
+
+class AliasTable:
+    """
+    Precomputed alias table for weighted random sampling.
+
+    Building the table is O(n); every draw afterwards is O(1): one
+    ``randrange(n)`` plus one ``random()`` comparison. Uniform weights
+    (all equal or all zero) allocate no columns and draw with a single
+    ``randrange(n)``.
+    """
+
+    __slots__ = ("n", "prob", "alias", "uniform")
+
+    def __init__(self, prob: Optional[array], alias: Optional[array], n: Optional[int] = None):
+        """
+        Initialize alias table from precomputed columns.
+
+        Args:
+            prob: Probability of keeping column ``i`` (None for uniform)
+            alias: Alias index used when column ``i`` is rejected (None for uniform)
+            n: Number of outcomes, required when the table is uniform
+        """
+        self.uniform = prob is None
+        self.n = n if self.uniform else len(prob)
+        self.prob = prob
+        self.alias = alias
+
+    @classmethod
+    def uniform_table(cls, n: int) -> "AliasTable":
+        """Build a table drawing each of ``n`` outcomes with equal probability."""
+        return cls(None, None, n)
+
+    @classmethod
+    def build(cls, weights: Sequence[float]) -> "AliasTable":
+        """
+        Build an alias table using Vose's algorithm.
+
+        Args:
+            weights: Non-negative weights (all zero means uniform)
+
+        Returns:
+            Alias table
+
+        Raises:
+            ValueError: If weights is empty
+        """
+        n = len(weights)
+        if n == 0:
+            raise ValueError("Cannot build alias table from empty weights")
+
+        first = weights[0]
+        if all(w == first for w in weights):
+            return cls.uniform_table(n)
+
+        total = float(sum(weights))
+        if total <= 0:
+            return cls.uniform_table(n)
+
+        prob = array("d", [1.0] * n)
+        alias = array("i", range(n))
+
+        scaled = [w * n / total for w in weights]
+        small: List[int] = []
+        large: List[int] = []
+        for i, p in enumerate(scaled):
+            (small if p < 1.0 else large).append(i)
+
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = (scaled[l] + scaled[s]) - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+
+        # Leftovers are 1.0 up to floating point error
+        for i in large:
+            prob[i] = 1.0
+        for i in small:
+            prob[i] = 1.0
+
+        return cls(prob, alias)
+
+    def draw(self, rand: random.Random = random) -> int:
+        """
+        Draw one index.
+
+        Args:
+            rand: Random source (module ``random`` or a ``random.Random``)
+
+        Returns:
+            Selected index
+        """
+        i = rand.randrange(self.n)
+        if self.uniform:
+            return i
+        return i if rand.random() < self.prob[i] else self.alias[i]
+
+    def draw_many(self, k: int, rand: random.Random = random) -> List[int]:
+        """
+        Draw ``k`` independent indices.
+
+        Same sampling as :meth:`draw`, with the attribute lookups hoisted
+        out of the loop.
+
+        Args:
+            k: Number of draws
+            rand: Random source (module ``random`` or a ``random.Random``)
+
+        Returns:
+            Selected indices
+        """
+        n = self.n
+        randrange = rand.randrange
+        indices = [randrange(n) for _ in range(k)]
+        if self.uniform:
+            return indices
+        prob, alias, rnd = self.prob, self.alias, rand.random
+        return [i if rnd() < prob[i] else alias[i] for i in indices]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize table for JSON caching."""
+        if self.uniform:
+            return {"n": self.n}
+        return {"prob": self.prob.tolist(), "alias": self.alias.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AliasTable":
+        """Restore table from :meth:`to_dict` output."""
+        if "prob" not in data:
+            return cls.uniform_table(data["n"])
+        return cls(array("d", data["prob"]), array("i", data["alias"]))
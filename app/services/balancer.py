@@ -1,18 +1,91 @@
 """
 Load balancer for distributing requests across providers.
 """
+import asyncio
 import random
-from typing import List, Optional, Dict
-from sqlalchemy import select
+import time
+import hashlib
+from typing import Any, Awaitable, Callable, List, NamedTuple, Optional, Dict, Tuple
+import msgpack
+import zstandard
+from sqlalchemy import select, lambda_stmt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.cache import RedisCache
+from app.core.config import settings
 from app.core.logger import get_logger
 from app.models.provider import Provider, ModelConfig, ModelProvider
 from app.models.health import ProviderHealth
+from app.services.alias_table import AliasTable
+from app.services.router import RequestRouter
 
 logger = get_logger(__name__)
 
+# Seconds a provider list stays cached (Redis and in-process)
+CACHE_TTL = 30
+
+# Pub/sub channel used to drop in-process selection caches on every worker
+INVALIDATE_CHANNEL = "balancer:invalidate"
+
+# Seconds the invalidation listener waits before resubscribing after a
+# Redis error
+RESUBSCRIBE_DELAY = 5
+
+# Cached payloads larger than this (bytes, after msgpack) are zstd-compressed
+COMPRESS_THRESHOLD = 1024
+
+# One-byte header on cached payloads
+_RAW = b"\x00"
+_ZSTD = b"\x01"
+
+_compressor = zstandard.ZstdCompressor(level=1)
+_decompressor = zstandard.ZstdDecompressor()
+
+# Hot-path queries as lambda statements: SQLAlchemy compiles them once and
+# reuses the cached SQL on every call. Plain columns skip ORM instance
+# construction.
+_HEALTHY_PROVIDERS_STMT = lambda_stmt(
+    lambda: select(
+        Provider.id.label("id"),
+        Provider.name.label("name"),
+        Provider.weight.label("weight"),
+        Provider.priority.label("priority"),
+        ProviderHealth.is_healthy.label("is_healthy")
+    )
+    .select_from(Provider)
+    .outerjoin(ProviderHealth, Provider.id == ProviderHealth.provider_id)
+    .where(Provider.enabled == True)
+    .order_by(Provider.priority.desc())
+)
+
+_PROVIDER_STATS_STMT = lambda_stmt(
+    lambda: select(
+        Provider.id,
+        Provider.name,
+        Provider.enabled,
+        Provider.priority,
+        Provider.weight,
+        ProviderHealth.is_healthy,
+        ProviderHealth.response_time_ms,
+        ProviderHealth.success_rate,
+        ProviderHealth.consecutive_failures
+    )
+    .select_from(Provider)
+    .outerjoin(ProviderHealth, Provider.id == ProviderHealth.provider_id)
+    .where(Provider.enabled == True)
+)
+
+
+class SelectionState(NamedTuple):
+    """Cached provider set with everything precomputed for selection."""
+    
+    fingerprint: Optional[str]
+    providers: List[Dict]
+    table: Optional[AliasTable]
+    sorted_names: List[str]  # By priority (desc) then weight (desc)
+    healthy_by_name: Dict[str, bool]  # For O(1) fallback lookups
+    expires_at: float
+
 
 class LoadBalancer:
     """
@@ -22,18 +95,56 @@ class LoadBalancer:
     - Provider weights
     - Provider health status
     - Provider priority
+    
+    Weighted draws use a Vose alias table built once per cache refresh,
+    so each selection is O(1) regardless of provider count. The
+    ``smooth_wrr`` strategy instead interleaves providers deterministically
+    (nginx-style smooth weighted round-robin, O(n) per pick).
     """
     
-    def __init__(self, db: AsyncSession, cache: RedisCache):
+    STRATEGIES = ("weighted_random", "smooth_wrr")
+    
+    # Process-wide selection cache shared by per-request instances
+    _local_cache: Dict[str, SelectionState] = {}
+    
+    # Sole healthy provider name and expiry per cache key, so single-provider
+    # deployments skip the selection path entirely
+    _singletons: Dict[str, Tuple[str, float]] = {}
+    
+    # Dedicated RNG so draws don't contend on the module-level ``random`` state.
+    # Shared across instances because a balancer is created per request.
+    _rng = random.Random()
+    
+    # Smooth WRR current weights per cache key, with the fingerprint of the
+    # provider set they belong to
+    _smooth_state: Dict[str, Tuple[Optional[str], List[int]]] = {}
+    
+    def __init__(
+        self,
+        db: AsyncSession,
+        cache: RedisCache,
+        seed: Optional[int] = None,
+        strategy: Optional[str] = None
+    ):
         """
         Initialize load balancer.
         
         Args:
             db: Database session
             cache: Redis cache instance
+            seed: Seed for a private RNG (uses the shared RNG if None)
+            strategy: Selection strategy (defaults to ``settings.balancer_strategy``)
+            
+        Raises:
+            ValueError: If strategy is unknown
         """
         self.db = db
         self.cache = cache
+        self.strategy = strategy or settings.balancer_strategy
+        if self.strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown balancer strategy: {self.strategy}")
+        if seed is not None:
+            self._rng = random.Random(seed)
     
     async def select_provider(
         self,
@@ -53,39 +164,36 @@ class LoadBalancer:
         Raises:
             Exception: If no healthy providers available for the model
         """
-        # Try cache first
         cache_key = f"balancer:providers:{model or 'default'}"
-        cached_providers = await self.cache.get(cache_key)
+        if not fallback_providers:
+            singleton = self._singletons.get(cache_key)
+            if singleton and singleton[1] > time.monotonic():
+                return singleton[0]
         
-        if cached_providers:
-            providers_data = cached_providers
-            logger.debug("Using cached providers list")
-        else:
-            # Query healthy providers that support the model
-            if model:
-                providers_data = await self._get_healthy_providers_for_model(model)
-            else:
-                providers_data = await self._get_healthy_providers()
-            
-            if not providers_data:
-                raise Exception(f"No healthy providers available for model: {model}")
-            
-            # Cache for 30 seconds
-            await self.cache.set(cache_key, providers_data, ttl=30)
+        state = await self._load_selection_for_model(cache_key, model)
+        providers_data = state.providers
+        if not providers_data:
+            raise Exception(f"No healthy providers available for model: {model}")
+        
+        if len(providers_data) == 1:
+            LoadBalancer._singletons[cache_key] = (providers_data[0]["name"], state.expires_at)
         
         # If fallback list provided, try those first
         if fallback_providers:
+            healthy_by_name = state.healthy_by_name
             for fallback_name in fallback_providers:
-                for provider_data in providers_data:
-                    if provider_data["name"] == fallback_name and provider_data["is_healthy"]:
-                        logger.info(f"Using fallback provider: {fallback_name}")
-                        return fallback_name
+                if healthy_by_name.get(fallback_name):
+                    logger.info("Using fallback provider: %s", fallback_name)
+                    return fallback_name
         
-        # Select using weighted random
-        selected = self._weighted_random_selection(providers_data)
+        if self.strategy == "smooth_wrr":
+            selected = self._smooth_wrr_selection(cache_key, state)
+        else:
+            selected = self._weighted_random_selection(providers_data, state.table)
         
         logger.info(
-            f"Load balancer selected provider: {selected}",
+            "Load balancer selected provider: %s",
+            selected,
             extra={
                 "provider": selected,
                 "model": model,
@@ -95,6 +203,39 @@ class LoadBalancer:
         
         return selected
     
+    async def select_providers_batch(self, n: int, model: Optional[str] = None) -> List[str]:
+        """
+        Select ``n`` providers in one call (e.g. for fan-out or shadow traffic).
+        
+        The provider set is loaded once and all draws use the same cached
+        alias table (or smooth WRR state), instead of ``n`` calls to
+        :meth:`select_provider`.
+        
+        Args:
+            n: Number of selections
+            model: Model name (required for model-specific routing)
+            
+        Returns:
+            Selected provider names, one per draw
+            
+        Raises:
+            Exception: If no healthy providers available for the model
+        """
+        cache_key = f"balancer:providers:{model or 'default'}"
+        state = await self._load_selection_for_model(cache_key, model)
+        providers_data = state.providers
+        if not providers_data:
+            raise Exception(f"No healthy providers available for model: {model}")
+        
+        if len(providers_data) == 1:
+            return [providers_data[0]["name"]] * n
+        
+        if self.strategy == "smooth_wrr":
+            return [self._smooth_wrr_selection(cache_key, state) for _ in range(n)]
+        
+        table = state.table or self._build_alias_table(providers_data)
+        return [providers_data[i]["name"] for i in table.draw_many(n, self._rng)]
+    
     async def get_all_healthy_providers(self, model: Optional[str] = None) -> List[str]:
         """
         Get all healthy provider names for failover.
@@ -105,60 +246,219 @@ class LoadBalancer:
         Returns:
             List of healthy provider names ordered by priority and weight
         """
-        # Try cache first
         cache_key = f"balancer:providers:{model or 'default'}"
-        cached_providers = await self.cache.get(cache_key)
+        state = await self._load_selection(cache_key, self._get_healthy_providers)
         
-        if cached_providers:
-            providers_data = cached_providers
+        # Names are pre-sorted once when the provider set is cached
+        return state.sorted_names
+    
+    async def _load_selection_for_model(
+        self,
+        cache_key: str,
+        model: Optional[str]
+    ) -> SelectionState:
+        """
+        Load the selection state for a model (or all providers if None).
+        
+        Args:
+            cache_key: Cache key for this provider set
+            model: Model name, or None for model-agnostic selection
+            
+        Returns:
+            Selection state (empty providers list if none are healthy)
+        """
+        if model:
+            loader = lambda: self._get_healthy_providers_for_model(model)
         else:
-            providers_data = await self._get_healthy_providers()
-            if providers_data:
-                await self.cache.set(cache_key, providers_data, ttl=30)
-        
-        # Return provider names sorted by priority (desc) then weight (desc)
-        sorted_providers = sorted(
-            providers_data,
-            key=lambda p: (p["priority"], p["weight"]),
-            reverse=True
-        )
+            loader = self._get_healthy_providers
         
-        return [p["name"] for p in sorted_providers]
+        return await self._load_selection(cache_key, loader)
     
-    async def _get_healthy_providers(self) -> List[Dict]:
+    async def _load_selection(
+        self,
+        cache_key: str,
+        loader: Callable[[], Awaitable[List[Dict]]]
+    ) -> SelectionState:
         """
-        Get list of ALL healthy providers from database (no model filtering).
+        Load providers and precomputed selection data, preferring the in-process cache.
         
+        A fresh in-process entry is used without touching Redis. Otherwise the
+        Redis entry (or, on a Redis miss, the database) is consulted and, if
+        its fingerprint matches the local one, the already-built state is
+        reused. The alias table and the sorted name list are computed only
+        when the provider set changes and are stored in the same value.
+        
+        Args:
+            cache_key: Cache key for this provider set
+            loader: Coroutine function querying providers from the database
+            
         Returns:
-            List of provider data dictionaries
+            Selection state (empty providers list if none are healthy)
         """
-        query = (
-            select(Provider, ProviderHealth)
-            .join(ProviderHealth, Provider.id == ProviderHealth.provider_id, isouter=True)
-            .where(Provider.enabled == True)
-            .order_by(Provider.priority.desc())
-        )
+        now = time.monotonic()
+        entry = self._local_cache.get(cache_key)
+        if entry and entry.expires_at > now:
+            return entry
+        
+        cached = self._unpack(await self.cache.get_bytes(cache_key))
+        if cached:
+            fingerprint = cached.get("fingerprint")
+            if entry and entry.fingerprint == fingerprint:
+                state = entry._replace(expires_at=now + CACHE_TTL)
+            else:
+                table_data = cached.get("alias_table")
+                providers_data = cached["providers"]
+                state = SelectionState(
+                    fingerprint=fingerprint,
+                    providers=providers_data,
+                    table=AliasTable.from_dict(table_data) if table_data else None,
+                    sorted_names=cached["sorted_names"],
+                    healthy_by_name={p["name"]: p["is_healthy"] for p in providers_data},
+                    expires_at=now + CACHE_TTL
+                )
+            logger.debug("Using cached providers list")
+        else:
+            providers_data = await loader()
+            if not providers_data:
+                return SelectionState(None, providers_data, None, [], {}, now)
+            
+            fingerprint = self._fingerprint(providers_data)
+            if entry and entry.fingerprint == fingerprint:
+                # Unchanged provider set: keep the built table (and the
+                # provider order its indices refer to)
+                state = entry._replace(expires_at=now + CACHE_TTL)
+            else:
+                sorted_names = [
+                    p["name"] for p in sorted(
+                        providers_data,
+                        key=lambda p: (p["priority"], p["weight"]),
+                        reverse=True
+                    )
+                ]
+                state = SelectionState(
+                    fingerprint=fingerprint,
+                    providers=providers_data,
+                    table=self._build_alias_table(providers_data),
+                    sorted_names=sorted_names,
+                    healthy_by_name={p["name"]: p["is_healthy"] for p in providers_data},
+                    expires_at=now + CACHE_TTL
+                )
+            await self.cache.set_bytes(
+                cache_key,
+                self._pack({
+                    "providers": state.providers,
+                    "alias_table": state.table.to_dict() if state.table else None,
+                    "sorted_names": state.sorted_names,
+                    "fingerprint": state.fingerprint
+                }),
+                ttl=CACHE_TTL
+            )
         
-        result = await self.db.execute(query)
-        rows = result.all()
+        LoadBalancer._local_cache[cache_key] = state
+        return state
+    
+    @staticmethod
+    def _pack(value: Any) -> bytes:
+        """
+        Encode a cache payload with msgpack, zstd-compressing large ones.
         
-        providers_data = []
-        for provider, health in rows:
-            # Consider provider healthy if:
-            # 1. No health record yet (new provider)
-            # 2. Health check shows healthy
-            is_healthy = health is None or health.is_healthy
+        Args:
+            value: Payload to encode
             
-            if is_healthy:
-                providers_data.append({
-                    "id": provider.id,
-                    "name": provider.name,
-                    "weight": provider.weight,
-                    "priority": provider.priority,
-                    "is_healthy": is_healthy
-                })
+        Returns:
+            Header byte followed by the encoded payload
+        """
+        packed = msgpack.packb(value, use_bin_type=True)
+        if len(packed) > COMPRESS_THRESHOLD:
+            return _ZSTD + _compressor.compress(packed)
+        return _RAW + packed
+    
+    @staticmethod
+    def _unpack(data: Optional[bytes]) -> Any:
+        """
+        Decode a payload produced by :meth:`_pack`.
         
-        return providers_data
+        Args:
+            data: Cached bytes (None on cache miss)
+            
+        Returns:
+            Decoded payload, or None on miss or undecodable data
+        """
+        if not data:
+            return None
+        
+        header, body = data[:1], data[1:]
+        try:
+            if header == _ZSTD:
+                body = _decompressor.decompress(body)
+            elif header != _RAW:
+                return None
+            return msgpack.unpackb(body, raw=False)
+        except (zstandard.ZstdError, ValueError) as e:
+            logger.warning("Failed to decode cached providers", error=str(e))
+            return None
+    
+    @staticmethod
+    def _fingerprint(providers: List[Dict]) -> str:
+        """
+        Compute a stable fingerprint of a provider set.
+        
+        Args:
+            providers: List of provider data dictionaries
+            
+        Returns:
+            Hex digest over sorted (id, name, weight, priority, is_healthy,
+            provider_model) tuples
+        """
+        items = sorted(
+            (p["id"], p["name"], p["weight"], p["priority"], p["is_healthy"], p.get("provider_model"))
+            for p in providers
+        )
+        return hashlib.blake2b(repr(items).encode(), digest_size=16).hexdigest()
+    
+    @classmethod
+    def invalidate_local_cache(cls) -> None:
+        """Drop all in-process selection caches."""
+        cls._local_cache.clear()
+        cls._singletons.clear()
+        cls._smooth_state.clear()
+    
+    @classmethod
+    async def notify_providers_changed(cls, cache: RedisCache) -> None:
+        """
+        Invalidate selection caches after provider configuration changes.
+        
+        Clears the local cache and Redis entries, then notifies other
+        workers over the ``balancer:invalidate`` channel.
+        
+        Args:
+            cache: Redis cache instance
+        """
+        cls.invalidate_local_cache()
+        await cache.clear("balancer:providers:*")
+        await cache.publish(INVALIDATE_CHANNEL, "1")
+    
+    async def _get_healthy_providers(self) -> List[Dict]:
+        """
+        Get list of ALL healthy providers from database (no model filtering).
+        
+        Relies on ``idx_provider_enabled_priority`` for the enabled filter and
+        priority ordering, and on the unique ``provider_health.provider_id``
+        index for the outer join.
+        
+        Returns:
+            List of provider data dictionaries
+        """
+        result = await self.db.execute(_HEALTHY_PROVIDERS_STMT)
+        
+        # Consider provider healthy if:
+        # 1. No health record yet (new provider)
+        # 2. Health check shows healthy
+        return [
+            dict(row, is_healthy=True)
+            for row in result.mappings()
+            if row["is_healthy"] is not False
+        ]
     
     async def _get_healthy_providers_for_model(self, model_name: str) -> List[Dict]:
         """
@@ -206,7 +506,9 @@ class LoadBalancer:
                 })
         
         logger.info(
-            f"Found {len(providers_data)} healthy providers for model {model_name}",
+            "Found %d healthy providers for model %s",
+            len(providers_data),
+            model_name,
             extra={
                 "model": model_name,
                 "providers": [p["name"] for p in providers_data]
@@ -215,7 +517,27 @@ class LoadBalancer:
         
         return providers_data
     
-    def _weighted_random_selection(self, providers: List[Dict]) -> str:
+    def _build_alias_table(self, providers: List[Dict]) -> Optional[AliasTable]:
+        """
+        Build alias table for weighted selection.
+        
+        Args:
+            providers: List of provider data dictionaries
+            
+        Returns:
+            Alias table (uniform when all weights are equal), or None for a
+            single provider
+        """
+        if len(providers) <= 1:
+            return None
+        
+        return AliasTable.build([p["weight"] for p in providers])
+    
+    def _weighted_random_selection(
+        self,
+        providers: List[Dict],
+        table: Optional[AliasTable] = None
+    ) -> str:
         """
         Select provider using weighted random algorithm.
         
@@ -223,6 +545,7 @@ class LoadBalancer:
         
         Args:
             providers: List of provider data dictionaries
+            table: Prebuilt alias table for ``providers`` (built on demand if omitted)
             
         Returns:
             Selected provider name
@@ -234,24 +557,52 @@ class LoadBalancer:
         if len(providers) == 1:
             return providers[0]["name"]
         
-        # Calculate total weight
-        total_weight = sum(p["weight"] for p in providers)
-        
-        if total_weight == 0:
-            # If all weights are 0, use equal probability
-            return random.choice(providers)["name"]
+        if table is None:
+            # Uniform weights (all equal or all zero): plain choice, no table
+            w0 = providers[0]["weight"]
+            if all(p["weight"] == w0 for p in providers):
+                return self._rng.choice(providers)["name"]
+            table = self._build_alias_table(providers)
         
-        # Weighted random selection
-        rand = random.uniform(0, total_weight)
-        cumulative = 0
+        return providers[table.draw(self._rng)]["name"]
+    
+    def _smooth_wrr_selection(self, cache_key: str, state: SelectionState) -> str:
+        """
+        Select provider using smooth weighted round-robin.
         
-        for provider in providers:
-            cumulative += provider["weight"]
-            if rand <= cumulative:
-                return provider["name"]
+        Every pick adds each provider's weight to its current weight, takes
+        the largest, and subtracts the total weight from it. Weights 4:3:2
+        yield A B C A B A C B A, repeating every 9 picks. The current weights
+        restart whenever the provider set changes.
         
-        # Fallback (should never reach here)
-        return providers[-1]["name"]
+        Args:
+            cache_key: Cache key of the provider set
+            state: Selection state for ``cache_key``
+            
+        Returns:
+            Selected provider name
+        """
+        providers = state.providers
+        weights = [p["weight"] for p in providers]
+        total = sum(weights)
+        if total <= 0:
+            # All-zero weights: plain round-robin, as weighted_random goes uniform
+            weights = [1] * len(providers)
+            total = len(providers)
+        
+        fingerprint, current = self._smooth_state.get(cache_key, (None, None))
+        if current is None or fingerprint != state.fingerprint or len(current) != len(providers):
+            current = [0] * len(providers)
+            LoadBalancer._smooth_state[cache_key] = (state.fingerprint, current)
+        
+        best = 0
+        for i, weight in enumerate(weights):
+            current[i] += weight
+            if current[i] > current[best]:
+                best = i
+        current[best] -= total
+        
+        return providers[best]["name"]
     
     async def get_provider_stats(self) -> Dict[str, Dict]:
         """
@@ -260,26 +611,60 @@ class LoadBalancer:
         Returns:
             Dictionary mapping provider names to their stats
         """
-        query = (
-            select(Provider, ProviderHealth)
-            .join(ProviderHealth, Provider.id == ProviderHealth.provider_id, isouter=True)
-            .where(Provider.enabled == True)
-        )
-        
-        result = await self.db.execute(query)
-        rows = result.all()
+        result = await self.db.execute(_PROVIDER_STATS_STMT)
         
         stats = {}
-        for provider, health in rows:
-            stats[provider.name] = {
-                "id": provider.id,
-                "enabled": provider.enabled,
-                "priority": provider.priority,
-                "weight": provider.weight,
-                "is_healthy": health.is_healthy if health else None,
-                "response_time_ms": health.response_time_ms if health else None,
-                "success_rate": health.success_rate if health else None,
-                "consecutive_failures": health.consecutive_failures if health else 0
+        for row in result.mappings():
+            stats[row["name"]] = {
+                "id": row["id"],
+                "enabled": row["enabled"],
+                "priority": row["priority"],
+                "weight": row["weight"],
+                "is_healthy": row["is_healthy"],
+                "response_time_ms": row["response_time_ms"],
+                "success_rate": row["success_rate"],
+                "consecutive_failures": row["consecutive_failures"] or 0
             }
         
-        return stats
\ No newline at end of file
+        return stats
+
+
+async def listen_for_invalidations(cache: RedisCache) -> None:
+    """
+    Background task dropping in-process selection caches and provider
+    snapshots on pub/sub notice.
+    
+    If the Redis connection drops, the listener resubscribes after
+    ``RESUBSCRIBE_DELAY`` seconds and drops the local caches, since
+    notices sent in the meantime were missed.
+    
+    Args:
+        cache: Connected Redis cache instance
+    """
+    while True:
+        pubsub = await cache.subscribe(INVALIDATE_CHANNEL)
+        if pubsub is None:
+            if not cache.enabled or not cache.redis:
+                logger.info("Balancer invalidation listener disabled (no Redis)")
+                return
+            await asyncio.sleep(RESUBSCRIBE_DELAY)
+            continue
+        
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    LoadBalancer.invalidate_local_cache()
+                    RequestRouter.invalidate_provider_cache()
+                    logger.debug("Balancer local cache invalidated")
+        except Exception as e:
+            logger.warning("Balancer invalidation listener lost Redis", error=str(e))
+        finally:
+            try:
+                await pubsub.unsubscribe(INVALIDATE_CHANNEL)
+                await pubsub.close()
+            except Exception:
+                pass
+        
+        LoadBalancer.invalidate_local_cache()
+        RequestRouter.invalidate_provider_cache()
+        await asyncio.sleep(RESUBSCRIBE_DELAY)
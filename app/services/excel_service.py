@@ -4,19 +4,186 @@ Excel Import/Export Service
 提供提供商、模型配置和模型-提供商关联的批量导入导出功能
 使用三工作表架构: Providers, Models, Associations
 """
+import asyncio
 from typing import List, Dict, Any, Optional, Tuple
 from io import BytesIO
 import json
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, Alignment, PatternFill
+from xlsxwriter import Workbook
+from python_calamine import CalamineWorkbook
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert, case, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from app.models.provider import Provider, ModelConfig, ModelProvider
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 表头样式(每个工作簿只注册一次)
+HEADER_FORMAT = {
+    'bold': True,
+    'font_color': 'white',
+    'fg_color': '#366092',
+    'align': 'center'
+}
+
+# 各工作表列宽: (列范围, 宽度)
+PROVIDERS_COLUMN_WIDTHS = [('A:A', 20), ('B:B', 15), ('C:C', 30), ('D:D', 35), ('E:G', 10)]
+MODELS_COLUMN_WIDTHS = [('A:A', 25), ('B:B', 30), ('C:C', 12), ('D:D', 10)]
+ASSOCIATIONS_COLUMN_WIDTHS = [('A:A', 25), ('B:B', 20), ('C:C', 30), ('D:E', 15), ('F:G', 10)]
+
+
+def _bool_text(column):
+    """布尔列在 SQL 中转为 'true'/'false' 文本"""
+    return case((column == True, 'true'), else_='false')
+
+
+# 各工作表表头及对应的导出列(顺序一致): 行转换在 SQL 中完成,
+# 查询结果的每行可直接写入工作表
+PROVIDERS_HEADERS = ['name', 'type', 'api_key', 'base_url', 'priority', 'weight', 'enabled']
+PROVIDERS_EXPORT_COLUMNS = (
+    Provider.name,
+    Provider.type,
+    Provider.api_key,
+    func.coalesce(Provider.base_url, ''),
+    Provider.priority,
+    Provider.weight,
+    _bool_text(Provider.enabled)
+)
+
+MODELS_HEADERS = ['name', 'remark', 'max_retry', 'timeout']
+MODELS_EXPORT_COLUMNS = (
+    ModelConfig.name,
+    func.coalesce(ModelConfig.remark, ''),
+    ModelConfig.max_retry,
+    ModelConfig.timeout
+)
+
+ASSOCIATIONS_HEADERS = ['model_name', 'provider_name', 'provider_model',
+                        'supports_tools', 'supports_vision', 'weight', 'enabled']
+ASSOCIATIONS_EXPORT_COLUMNS = (
+    ModelConfig.name,
+    Provider.name,
+    ModelProvider.provider_model,
+    _bool_text(ModelProvider.tool_call),
+    _bool_text(ModelProvider.image),
+    ModelProvider.weight,
+    _bool_text(ModelProvider.enabled)
+)
+
+
+# 模板示例数据(数据库为空时导出), 静态常量只构造一次; 写入时不会被修改
+PROVIDERS_SAMPLE_ROWS = (
+    ('OpenAI-Main', 'openai', 'sk-xxx', 'https://api.openai.com/v1', 100, 100, 'true'),
+    ('Anthropic-Main', 'anthropic', 'sk-ant-xxx', 'https://api.anthropic.com/v1', 100, 100, 'true'),
+)
+MODELS_SAMPLE_ROWS = (
+    ('gpt-4o', 'GPT-4 Optimized', 3, 60),
+    ('claude-3.5-sonnet', 'Claude 3.5 Sonnet', 3, 60),
+)
+ASSOCIATIONS_SAMPLE_ROWS = (
+    ('gpt-4o', 'OpenAI-Main', 'gpt-4o-2024-05-13', 'true', 'true', 100, 'true'),
+    ('claude-3.5-sonnet', 'Anthropic-Main', 'claude-3-5-sonnet-20241022', 'true', 'true', 100, 'true'),
+)
+
+
+def write_sheets(
+    sheets: Dict[str, List[List[Any]]],
+    column_widths: Optional[Dict[str, List[Tuple[str, int]]]] = None
+) -> BytesIO:
+    """
+    将多个工作表写入一个 Excel 文件(每个工作表首行为表头)
+    
+    纯同步 CPU 操作, 异步代码中应通过 asyncio.to_thread 调用
+    
+    Args:
+        sheets: 工作表名称到行列表的映射, 第一行为表头
+        column_widths: 工作表名称到 (列范围, 宽度) 列表的映射
+        
+    Returns:
+        BytesIO: Excel 文件的字节流
+    """
+    output = BytesIO()
+    wb = Workbook(output, {'constant_memory': True, 'strings_to_numbers': False})
+    header_format = wb.add_format(HEADER_FORMAT)
+    
+    for name, rows in sheets.items():
+        ws = wb.add_worksheet(name)
+        for row_num, row in enumerate(rows):
+            ws.write_row(row_num, 0, row, header_format if row_num == 0 else None)
+        for columns, width in (column_widths or {}).get(name, []):
+            ws.set_column(columns, width)
+    
+    wb.close()
+    output.seek(0)
+    return output
+
+
+def _normalize_cell(value: Any) -> Any:
+    """
+    Normalize a calamine cell value to the shapes the importers expect.
+    
+    Calamine returns empty cells as '' and every number as float; map them
+    back to None and int so row parsing is independent of the reader.
+    Strings are stripped here once, so blank cells also become None.
+    """
+    if isinstance(value, str):
+        return value.strip() or None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+# 视为真值的单元格文本(小写)
+_TRUE_VALUES = frozenset({'true', 'yes', '是', '1'})
+
+
+def _to_int(value: Any, default: int) -> int:
+    """单元格转整数, 无法转换时返回默认值"""
+    if isinstance(value, int):
+        return value
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _to_bool(value: Any, default: bool) -> bool:
+    """单元格转布尔值('true'/'yes'/'是'/1, 不区分大小写), 空值返回默认值"""
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value.lower() in _TRUE_VALUES
+    return value == 1
+
+
+def _to_str(value: Any, default: Optional[str]) -> Optional[str]:
+    """单元格转字符串(已在读取时去除首尾空白), 空值返回默认值"""
+    if value is None:
+        return default
+    if isinstance(value, str):
+        return value
+    return str(value)
+
+
+def _read_sheets(file: BytesIO) -> Dict[str, List[tuple]]:
+    """
+    读取工作簿中所有工作表的数据行(不含表头)
+    
+    纯同步 CPU 操作, 异步代码中应通过 asyncio.to_thread 调用
+    """
+    wb = CalamineWorkbook.from_filelike(file)
+    sheets = {}
+    for sheet_name in wb.sheet_names:
+        rows = wb.get_sheet_by_name(sheet_name).iter_rows()
+        next(rows, None)  # 跳过表头
+        sheets[sheet_name] = [tuple(_normalize_cell(cell) for cell in row) for row in rows]
+    return sheets
+
 
 class ExcelService:
     """Excel 批量导入导出服务 - 三工作表架构"""
@@ -41,183 +208,88 @@ class ExcelService:
         logger.info("Exporting all data to Excel with 3 sheets")
         
         try:
-            wb = Workbook()
-            
-            # 创建三个工作表
-            await self._create_providers_sheet(wb, include_sample)
-            await self._create_models_sheet(wb, include_sample)
-            await self._create_associations_sheet(wb, include_sample)
-            
-            # 删除默认的Sheet
-            if 'Sheet' in wb.sheetnames:
-                del wb['Sheet']
+            # 三个查询互不依赖, 各用独立会话并发执行
+            providers_rows, models_rows, associations_rows = await asyncio.gather(
+                self._query_rows(self._providers_rows, include_sample),
+                self._query_rows(self._models_rows, include_sample),
+                self._query_rows(self._associations_rows, include_sample)
+            )
+            sheets = {
+                'Providers': providers_rows,
+                'Models': models_rows,
+                'Associations': associations_rows
+            }
+            column_widths = {
+                'Providers': PROVIDERS_COLUMN_WIDTHS,
+                'Models': MODELS_COLUMN_WIDTHS,
+                'Associations': ASSOCIATIONS_COLUMN_WIDTHS
+            }
             
-            # 保存到字节流
-            output = BytesIO()
-            wb.save(output)
-            output.seek(0)
+            # 序列化在线程中执行, 避免阻塞事件循环
+            output = await asyncio.to_thread(write_sheets, sheets, column_widths)
             
             logger.info("Exported all data successfully")
             return output
             
         except Exception as e:
-            logger.error(f"Failed to export all data: {str(e)}", exc_info=True)
+            logger.error("Failed to export all data: %s", e, exc_info=True)
             raise
     
-    async def _create_providers_sheet(self, wb: Workbook, include_sample: bool = False):
-        """创建 Providers 工作表"""
-        ws = wb.active
-        ws.title = "Providers"
-        
-        # 设置表头
-        headers = ['name', 'type', 'api_key', 'base_url', 'priority', 'weight', 'enabled']
-        ws.append(headers)
-        
-        # 设置表头样式
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF")
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center')
-        
+    async def _query_rows(self, builder, include_sample: bool) -> List[List[Any]]:
+        """在与 self.db 同一引擎上的独立会话中执行行生成函数(会话不可并发共享)"""
+        async with AsyncSession(self.db.bind) as db:
+            return await builder(db, include_sample)
+    
+    @staticmethod
+    async def _providers_rows(db: AsyncSession, include_sample: bool = False) -> List[List[Any]]:
+        """生成 Providers 工作表的行(含表头)"""
         # 获取现有数据
-        query = select(Provider).order_by(Provider.priority.desc(), Provider.id)
-        result = await self.db.execute(query)
-        providers = result.scalars().all()
-        
-        for p in providers:
-            ws.append([
-                p.name,
-                p.type,
-                p.api_key,
-                p.base_url or '',
-                p.priority,
-                p.weight,
-                'true' if p.enabled else 'false'
-            ])
+        query = (
+            select(*PROVIDERS_EXPORT_COLUMNS)
+            .order_by(Provider.priority.desc(), Provider.id)
+        )
+        result = await db.stream(query)
+        rows = [list(row) async for row in result]
         
         # 如果需要示例数据
-        if include_sample and not providers:
-            ws.append([
-                'OpenAI-Main',
-                'openai',
-                'sk-xxx',
-                'https://api.openai.com/v1',
-                100,
-                100,
-                'true'
-            ])
-            ws.append([
-                'Anthropic-Main',
-                'anthropic',
-                'sk-ant-xxx',
-                'https://api.anthropic.com/v1',
-                100,
-                100,
-                'true'
-            ])
-        
-        # 调整列宽
-        ws.column_dimensions['A'].width = 20
-        ws.column_dimensions['B'].width = 15
-        ws.column_dimensions['C'].width = 30
-        ws.column_dimensions['D'].width = 35
-        ws.column_dimensions['E'].width = 10
-        ws.column_dimensions['F'].width = 10
-        ws.column_dimensions['G'].width = 10
-    
-    async def _create_models_sheet(self, wb: Workbook, include_sample: bool = False):
-        """创建 Models 工作表"""
-        ws = wb.create_sheet("Models")
-        
-        # 设置表头
-        headers = ['name', 'remark', 'max_retry', 'timeout']
-        ws.append(headers)
-        
-        # 设置表头样式
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF")
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center')
+        if include_sample and not rows:
+            rows.extend(PROVIDERS_SAMPLE_ROWS)
         
+        return [PROVIDERS_HEADERS] + rows
+    
+    @staticmethod
+    async def _models_rows(db: AsyncSession, include_sample: bool = False) -> List[List[Any]]:
+        """生成 Models 工作表的行(含表头)"""
         # 获取现有数据
-        query = select(ModelConfig).order_by(ModelConfig.id)
-        result = await self.db.execute(query)
-        models = result.scalars().all()
-        
-        for m in models:
-            ws.append([
-                m.name,
-                m.remark or '',
-                m.max_retry,
-                m.timeout
-            ])
+        query = select(*MODELS_EXPORT_COLUMNS).order_by(ModelConfig.id)
+        result = await db.stream(query)
+        rows = [list(row) async for row in result]
         
         # 如果需要示例数据
-        if include_sample and not models:
-            ws.append(['gpt-4o', 'GPT-4 Optimized', 3, 60])
-            ws.append(['claude-3.5-sonnet', 'Claude 3.5 Sonnet', 3, 60])
-        
-        # 调整列宽
-        ws.column_dimensions['A'].width = 25
-        ws.column_dimensions['B'].width = 30
-        ws.column_dimensions['C'].width = 12
-        ws.column_dimensions['D'].width = 10
-    
-    async def _create_associations_sheet(self, wb: Workbook, include_sample: bool = False):
-        """创建 Associations 工作表"""
-        ws = wb.create_sheet("Associations")
-        
-        # 设置表头
-        headers = ['model_name', 'provider_name', 'provider_model', 
-                   'supports_tools', 'supports_vision', 'weight', 'enabled']
-        ws.append(headers)
-        
-        # 设置表头样式
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF")
-        for cell in ws[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center')
+        if include_sample and not rows:
+            rows.extend(MODELS_SAMPLE_ROWS)
         
+        return [MODELS_HEADERS] + rows
+    
+    @staticmethod
+    async def _associations_rows(db: AsyncSession, include_sample: bool = False) -> List[List[Any]]:
+        """生成 Associations 工作表的行(含表头)"""
         # 获取现有数据
         query = (
-            select(ModelProvider, ModelConfig, Provider)
+            select(*ASSOCIATIONS_EXPORT_COLUMNS)
+            .select_from(ModelProvider)
             .join(ModelConfig, ModelProvider.model_id == ModelConfig.id)
             .join(Provider, ModelProvider.provider_id == Provider.id)
             .order_by(ModelProvider.id)
         )
-        result = await self.db.execute(query)
-        rows = result.all()
-        
-        for mapping, model, provider in rows:
-            ws.append([
-                model.name,
-                provider.name,
-                mapping.provider_model,
-                'true' if mapping.tool_call else 'false',
-                'true' if mapping.image else 'false',
-                mapping.weight,
-                'true' if mapping.enabled else 'false'
-            ])
+        result = await db.stream(query)
+        rows = [list(row) async for row in result]
         
         # 如果需要示例数据
         if include_sample and not rows:
-            ws.append(['gpt-4o', 'OpenAI-Main', 'gpt-4o-2024-05-13', 'true', 'true', 100, 'true'])
-            ws.append(['claude-3.5-sonnet', 'Anthropic-Main', 'claude-3-5-sonnet-20241022', 'true', 'true', 100, 'true'])
-        
-        # 调整列宽
-        ws.column_dimensions['A'].width = 25
-        ws.column_dimensions['B'].width = 20
-        ws.column_dimensions['C'].width = 30
-        ws.column_dimensions['D'].width = 15
-        ws.column_dimensions['E'].width = 15
-        ws.column_dimensions['F'].width = 10
-        ws.column_dimensions['G'].width = 10
+            rows.extend(ASSOCIATIONS_SAMPLE_ROWS)
+        
+        return [ASSOCIATIONS_HEADERS] + rows
     
     async def download_template(self, with_sample: bool = False) -> BytesIO:
         """
@@ -237,7 +309,7 @@ class ExcelService:
     
     async def import_all(self, file: BytesIO) -> Dict[str, Any]:
         """
-        从 Excel 导入所有配置(三个工作表)
+        从 Excel 导入所有配置(三个工作表, 单事务提交)
         
         Args:
             file: Excel 文件的字节流
@@ -248,20 +320,26 @@ class ExcelService:
         logger.info("Importing all data from Excel with 3 sheets")
         
         try:
-            wb = load_workbook(file)
+            # 解析在线程中执行, 避免阻塞事件循环
+            sheets = await asyncio.to_thread(_read_sheets, file)
             
             # 创建名称到ID的映射
             provider_map = {}
             model_map = {}
             
+            # 提供商与模型虽无依赖, 仍在同一会话中顺序导入:
+            # 拆分到多个会话会破坏单事务回滚, 且 SQLite 只允许一个写事务
             # 导入提供商
-            providers_stats = await self._import_providers_sheet(wb, provider_map)
+            providers_stats = await self._import_providers_sheet(sheets, provider_map)
             
             # 导入模型
-            models_stats = await self._import_models_sheet(wb, model_map)
+            models_stats = await self._import_models_sheet(sheets, model_map)
             
             # 导入关联
-            associations_stats = await self._import_associations_sheet(wb, provider_map, model_map)
+            associations_stats = await self._import_associations_sheet(sheets, provider_map, model_map)
+            
+            # 三个工作表在同一事务中提交, 任一失败则整体回滚
+            await self.db.commit()
             
             # 计算总结
             result = {
@@ -287,15 +365,35 @@ class ExcelService:
                 }
             }
             
-            logger.info(f"Import completed: {result['summary']}")
+            logger.info("Import completed: %s", result['summary'])
             return result
             
         except Exception as e:
             await self.db.rollback()
-            logger.error(f"Failed to import data: {str(e)}", exc_info=True)
+            logger.error("Failed to import data: %s", e, exc_info=True)
             raise
     
-    async def _import_providers_sheet(self, wb: Workbook, provider_map: Dict[str, int]) -> Dict[str, Any]:
+    async def _fetch_name_map(self, model, names) -> Dict[str, int]:
+        """一次 IN 查询获取名称到ID的映射"""
+        names = list(names)
+        if not names:
+            return {}
+        query = select(model.id, model.name).where(model.name.in_(names))
+        result = await self.db.execute(query)
+        return {name: id_ for id_, name in result.all()}
+    
+    async def _insert_ignore(self, model, rows: List[Dict[str, Any]], index_elements: List[str]) -> None:
+        """批量插入, 唯一键冲突的行直接忽略"""
+        dialect = self.db.get_bind().dialect.name
+        if dialect == 'sqlite':
+            stmt = sqlite_insert(model).on_conflict_do_nothing(index_elements=index_elements)
+        elif dialect == 'mysql':
+            stmt = insert(model).prefix_with('IGNORE')
+        else:
+            stmt = insert(model)
+        await self.db.execute(stmt, rows)
+    
+    async def _import_providers_sheet(self, sheets: Dict[str, List[tuple]], provider_map: Dict[str, int]) -> Dict[str, Any]:
         """导入 Providers 工作表"""
         stats = {
             'total': 0,
@@ -304,13 +402,14 @@ class ExcelService:
             'errors': []
         }
         
-        if 'Providers' not in wb.sheetnames:
+        if 'Providers' not in sheets:
             stats['errors'].append({'row': 0, 'field': 'sheet', 'error': 'Providers sheet not found'})
             return stats
         
-        ws = wb['Providers']
-        rows = list(ws.iter_rows(min_row=2, values_only=True))
+        rows = sheets['Providers']
         
+        # 解析所有行(同名只保留第一行)
+        parsed: Dict[str, Dict[str, Any]] = {}
         for row_num, row in enumerate(rows, start=2):
             stats['total'] += 1
             
@@ -318,7 +417,7 @@ class ExcelService:
                 if not row or all(cell is None for cell in row):
                     continue
                 
-                name = str(row[0]).strip() if row[0] else ''
+                name = _to_str(row[0], '')
                 if not name:
                     stats['errors'].append({
                         'row': row_num,
@@ -327,32 +426,19 @@ class ExcelService:
                     })
                     continue
                 
-                # 检查是否已存在
-                query = select(Provider).where(Provider.name == name)
-                result = await self.db.execute(query)
-                existing = result.scalar_one_or_none()
-                
-                if existing:
-                    provider_map[name] = existing.id
+                if name in parsed:
                     stats['skipped'] += 1
                     continue
                 
-                # 创建提供商
-                provider = Provider(
-                    name=name,
-                    type=str(row[1]).strip() if row[1] else 'openai',
-                    api_key=str(row[2]).strip() if row[2] else '',
-                    base_url=str(row[3]).strip() if row[3] else None,
-                    priority=int(row[4]) if row[4] and str(row[4]).isdigit() else 100,
-                    weight=int(row[5]) if row[5] and str(row[5]).isdigit() else 100,
-                    enabled=str(row[6]).lower() == 'true' if row[6] else True
-                )
-                
-                self.db.add(provider)
-                await self.db.flush()
-                
-                provider_map[name] = provider.id
-                stats['imported'] += 1
+                parsed[name] = {
+                    'name': name,
+                    'type': _to_str(row[1], 'openai'),
+                    'api_key': _to_str(row[2], ''),
+                    'base_url': _to_str(row[3], None),
+                    'priority': _to_int(row[4], 100),
+                    'weight': _to_int(row[5], 100),
+                    'enabled': _to_bool(row[6], True)
+                }
                 
             except Exception as e:
                 stats['errors'].append({
@@ -361,10 +447,22 @@ class ExcelService:
                     'error': str(e)
                 })
         
-        await self.db.commit()
+        # 一次查询已存在的提供商
+        existing = await self._fetch_name_map(Provider, parsed.keys())
+        provider_map.update(existing)
+        stats['skipped'] += len(existing)
+        
+        # 批量插入新提供商
+        to_insert = [values for name, values in parsed.items() if name not in existing]
+        if to_insert:
+            await self._insert_ignore(Provider, to_insert, ['name'])
+            inserted = await self._fetch_name_map(Provider, [v['name'] for v in to_insert])
+            provider_map.update(inserted)
+            stats['imported'] += len(inserted)
+        
         return stats
     
-    async def _import_models_sheet(self, wb: Workbook, model_map: Dict[str, int]) -> Dict[str, Any]:
+    async def _import_models_sheet(self, sheets: Dict[str, List[tuple]], model_map: Dict[str, int]) -> Dict[str, Any]:
         """导入 Models 工作表"""
         stats = {
             'total': 0,
@@ -373,13 +471,14 @@ class ExcelService:
             'errors': []
         }
         
-        if 'Models' not in wb.sheetnames:
+        if 'Models' not in sheets:
             stats['errors'].append({'row': 0, 'field': 'sheet', 'error': 'Models sheet not found'})
             return stats
         
-        ws = wb['Models']
-        rows = list(ws.iter_rows(min_row=2, values_only=True))
+        rows = sheets['Models']
         
+        # 解析所有行(同名只保留第一行)
+        parsed: Dict[str, Dict[str, Any]] = {}
         for row_num, row in enumerate(rows, start=2):
             stats['total'] += 1
             
@@ -387,7 +486,7 @@ class ExcelService:
                 if not row or all(cell is None for cell in row):
                     continue
                 
-                name = str(row[0]).strip() if row[0] else ''
+                name = _to_str(row[0], '')
                 if not name:
                     stats['errors'].append({
                         'row': row_num,
@@ -396,30 +495,17 @@ class ExcelService:
                     })
                     continue
                 
-                # 检查是否已存在
-                query = select(ModelConfig).where(ModelConfig.name == name)
-                result = await self.db.execute(query)
-                existing = result.scalar_one_or_none()
-                
-                if existing:
-                    model_map[name] = existing.id
+                if name in parsed:
                     stats['skipped'] += 1
                     continue
                 
-                # 创建模型
-                model = ModelConfig(
-                    name=name,
-                    remark=str(row[1]).strip() if row[1] else None,
-                    max_retry=int(row[2]) if row[2] and str(row[2]).isdigit() else 3,
-                    timeout=int(row[3]) if row[3] and str(row[3]).isdigit() else 30,
-                    enabled=True
-                )
-                
-                self.db.add(model)
-                await self.db.flush()
-                
-                model_map[name] = model.id
-                stats['imported'] += 1
+                parsed[name] = {
+                    'name': name,
+                    'remark': _to_str(row[1], None),
+                    'max_retry': _to_int(row[2], 3),
+                    'timeout': _to_int(row[3], 30),
+                    'enabled': True
+                }
                 
             except Exception as e:
                 stats['errors'].append({
@@ -428,12 +514,24 @@ class ExcelService:
                     'error': str(e)
                 })
         
-        await self.db.commit()
+        # 一次查询已存在的模型
+        existing = await self._fetch_name_map(ModelConfig, parsed.keys())
+        model_map.update(existing)
+        stats['skipped'] += len(existing)
+        
+        # 批量插入新模型
+        to_insert = [values for name, values in parsed.items() if name not in existing]
+        if to_insert:
+            await self._insert_ignore(ModelConfig, to_insert, ['name'])
+            inserted = await self._fetch_name_map(ModelConfig, [v['name'] for v in to_insert])
+            model_map.update(inserted)
+            stats['imported'] += len(inserted)
+        
         return stats
     
     async def _import_associations_sheet(
         self, 
-        wb: Workbook, 
+        sheets: Dict[str, List[tuple]], 
         provider_map: Dict[str, int],
         model_map: Dict[str, int]
     ) -> Dict[str, Any]:
@@ -445,13 +543,14 @@ class ExcelService:
             'errors': []
         }
         
-        if 'Associations' not in wb.sheetnames:
+        if 'Associations' not in sheets:
             stats['errors'].append({'row': 0, 'field': 'sheet', 'error': 'Associations sheet not found'})
             return stats
         
-        ws = wb['Associations']
-        rows = list(ws.iter_rows(min_row=2, values_only=True))
+        rows = sheets['Associations']
         
+        # 第一遍: 校验必填字段并解析
+        candidates: List[Tuple[int, str, str, Dict[str, Any]]] = []
         for row_num, row in enumerate(rows, start=2):
             stats['total'] += 1
             
@@ -459,9 +558,9 @@ class ExcelService:
                 if not row or all(cell is None for cell in row):
                     continue
                 
-                model_name = str(row[0]).strip() if row[0] else ''
-                provider_name = str(row[1]).strip() if row[1] else ''
-                provider_model = str(row[2]).strip() if row[2] else ''
+                model_name = _to_str(row[0], '')
+                provider_name = _to_str(row[1], '')
+                provider_model = _to_str(row[2], '')
                 
                 # 验证必填字段
                 if not model_name:
@@ -480,52 +579,13 @@ class ExcelService:
                     })
                     continue
                 
-                # 查找模型ID和提供商ID
-                model_id = model_map.get(model_name)
-                provider_id = provider_map.get(provider_name)
-                
-                if not model_id:
-                    stats['errors'].append({
-                        'row': row_num,
-                        'field': 'model_name',
-                        'error': f"Model '{model_name}' not found"
-                    })
-                    continue
-                
-                if not provider_id:
-                    stats['errors'].append({
-                        'row': row_num,
-                        'field': 'provider_name',
-                        'error': f"Provider '{provider_name}' not found"
-                    })
-                    continue
-                
-                # 检查是否已存在
-                query = select(ModelProvider).where(
-                    ModelProvider.model_id == model_id,
-                    ModelProvider.provider_id == provider_id,
-                    ModelProvider.provider_model == provider_model
-                )
-                result = await self.db.execute(query)
-                existing = result.scalar_one_or_none()
-                
-                if existing:
-                    stats['skipped'] += 1
-                    continue
-                
-                # 创建关联
-                association = ModelProvider(
-                    model_id=model_id,
-                    provider_id=provider_id,
-                    provider_model=provider_model,
-                    tool_call=str(row[3]).lower() == 'true' if row[3] else True,
-                    image=str(row[4]).lower() == 'true' if row[4] else False,
-                    weight=int(row[5]) if row[5] and str(row[5]).isdigit() else 100,
-                    enabled=str(row[6]).lower() == 'true' if row[6] else True
-                )
-                
-                self.db.add(association)
-                stats['imported'] += 1
+                candidates.append((row_num, model_name, provider_name, {
+                    'provider_model': provider_model,
+                    'tool_call': _to_bool(row[3], True),
+                    'image': _to_bool(row[4], False),
+                    'weight': _to_int(row[5], 100),
+                    'enabled': _to_bool(row[6], True)
+                }))
                 
             except Exception as e:
                 stats['errors'].append({
@@ -534,5 +594,58 @@ class ExcelService:
                     'error': str(e)
                 })
         
-        await self.db.commit()
-        return stats
\ No newline at end of file
+        # 未出现在本次导入中的模型/提供商, 各用一次 IN 查询从数据库补全
+        missing_models = {c[1] for c in candidates} - model_map.keys()
+        missing_providers = {c[2] for c in candidates} - provider_map.keys()
+        model_map.update(await self._fetch_name_map(ModelConfig, missing_models))
+        provider_map.update(await self._fetch_name_map(Provider, missing_providers))
+        
+        # 一次查询已存在的关联
+        existing_keys = set()
+        model_ids = {model_map[c[1]] for c in candidates if c[1] in model_map}
+        if model_ids:
+            query = select(
+                ModelProvider.model_id,
+                ModelProvider.provider_id,
+                ModelProvider.provider_model
+            ).where(ModelProvider.model_id.in_(model_ids))
+            result = await self.db.execute(query)
+            existing_keys = {tuple(r) for r in result.all()}
+        
+        # 第二遍: 解析ID并去重
+        to_insert: List[Dict[str, Any]] = []
+        for row_num, model_name, provider_name, values in candidates:
+            model_id = model_map.get(model_name)
+            provider_id = provider_map.get(provider_name)
+            
+            if not model_id:
+                stats['errors'].append({
+                    'row': row_num,
+                    'field': 'model_name',
+                    'error': f"Model '{model_name}' not found"
+                })
+                continue
+            
+            if not provider_id:
+                stats['errors'].append({
+                    'row': row_num,
+                    'field': 'provider_name',
+                    'error': f"Provider '{provider_name}' not found"
+                })
+                continue
+            
+            # 检查是否已存在(数据库或本次导入)
+            key = (model_id, provider_id, values['provider_model'])
+            if key in existing_keys:
+                stats['skipped'] += 1
+                continue
+            existing_keys.add(key)
+            
+            to_insert.append(dict(values, model_id=model_id, provider_id=provider_id))
+        
+        # 批量插入新关联
+        if to_insert:
+            await self.db.execute(insert(ModelProvider), to_insert)
+            stats['imported'] += len(to_insert)
+        
+        return stats
@@ -2,9 +2,10 @@
 Health check service for monitoring provider availability.
 """
 import asyncio
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List
-from sqlalchemy import select, update
+from typing import Dict, List, Optional
+from sqlalchemy import select, update, insert, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
@@ -36,97 +37,156 @@ class HealthCheckService:
         self.check_interval = settings.health_check_interval
         self.max_errors = settings.health_check_max_errors
         self.retry_hours = settings.health_check_retry_hours
+        self.concurrency = settings.health_check_concurrency
+        self.timeout = settings.health_check_timeout
+        
+        # Set by stop() to end the loop without waiting out the interval
+        self._stop_event = asyncio.Event()
     
     async def start(self):
-        """Start the health check loop."""
+        """Start the health check loop (runs until stop() is called)."""
         logger.info(f"Starting health check service (interval: {self.check_interval}s)")
+        self._stop_event.clear()
         
-        while True:
+        while not self._stop_event.is_set():
             try:
                 await self.check_all_providers()
             except Exception as e:
                 logger.error(f"Health check loop error: {str(e)}", exc_info=True)
             
-            # Wait before next check
-            await asyncio.sleep(self.check_interval)
+            # Wait before next check, waking early on stop
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=self.check_interval)
+            except asyncio.TimeoutError:
+                pass
+        
+        logger.info("Health check service stopped")
+    
+    def stop(self):
+        """Stop the health check loop."""
+        self._stop_event.set()
     
     async def check_all_providers(self):
         """Check health of all enabled providers."""
-        async with AsyncSessionLocal() as db:
-            try:
-                # Get all enabled providers
-                query = select(Provider).where(Provider.enabled == True)
+        try:
+            # Skip providers checked within the last interval
+            cutoff = datetime.utcnow() - timedelta(seconds=self.check_interval)
+            
+            async with AsyncSessionLocal() as db:
+                # Get enabled providers due for a check, with their health record
+                query = (
+                    select(Provider, ProviderHealth)
+                    .outerjoin(ProviderHealth, Provider.id == ProviderHealth.provider_id)
+                    .where(Provider.enabled == True)
+                    .where(or_(
+                        ProviderHealth.last_check.is_(None),
+                        ProviderHealth.last_check < cutoff
+                    ))
+                )
                 result = await db.execute(query)
-                providers = result.scalars().all()
-                
-                if not providers:
-                    logger.debug("No enabled providers to check")
-                    return
-                
-                logger.info(f"Checking health of {len(providers)} providers")
-                
-                # Check each provider
-                tasks = [
-                    self.check_provider_health(db, provider)
-                    for provider in providers
-                ]
-                await asyncio.gather(*tasks, return_exceptions=True)
-                
-                await db.commit()
-                
-            except Exception as e:
-                logger.error(f"Failed to check providers: {str(e)}", exc_info=True)
-                await db.rollback()
+                rows = result.all()
+            
+            if not rows:
+                logger.debug("No providers due for a health check")
+                return
+            
+            logger.info(f"Checking health of {len(rows)} providers")
+            
+            # Probe providers with bounded concurrency (no DB access)
+            semaphore = asyncio.Semaphore(self.concurrency)
+            
+            async def probe(provider: Provider, health: Optional[ProviderHealth]) -> Dict:
+                async with semaphore:
+                    return await self._probe_provider(provider, health)
+            
+            values = await asyncio.gather(
+                *(probe(provider, health) for provider, health in rows),
+                return_exceptions=True
+            )
+            
+            # Write all results in one transaction
+            async with AsyncSessionLocal() as db:
+                try:
+                    await self._save_health_values(
+                        db, [v for v in values if isinstance(v, dict)]
+                    )
+                    await db.commit()
+                except Exception:
+                    await db.rollback()
+                    raise
+        
+        except Exception as e:
+            logger.error(f"Failed to check providers: {str(e)}", exc_info=True)
     
     async def check_provider_health(
         self,
         db: AsyncSession,
-        provider: Provider
+        provider: Provider,
+        health: Optional[ProviderHealth] = None
     ) -> Dict:
         """
-        Check health of a single provider.
+        Check health of a single provider and stage the result in ``db``.
         
         Args:
-            db: Database session
+            db: Database session (caller commits)
             provider: Provider to check
+            health: Health record already loaded elsewhere (queried if None)
             
         Returns:
             Health check result dictionary
         """
-        logger.debug(f"Checking provider: {provider.name}")
+        if health is None:
+            query = select(ProviderHealth).where(
+                ProviderHealth.provider_id == provider.id
+            )
+            result = await db.execute(query)
+            health = result.scalar_one_or_none()
         
-        # Get existing health record
-        query = select(ProviderHealth).where(
-            ProviderHealth.provider_id == provider.id
-        )
-        result = await db.execute(query)
-        health = result.scalar_one_or_none()
+        values = await self._probe_provider(provider, health)
+        await self._save_health_values(db, [values])
         
-        # Create if doesn't exist
-        if not health:
-            health = ProviderHealth(
-                provider_id=provider.id,
-                is_healthy=True,
-                consecutive_failures=0,
-                total_checks=0,
-                successful_checks=0,
-                last_check=datetime.utcnow()
-            )
-            db.add(health)
+        return {
+            "provider_id": provider.id,
+            "provider_name": provider.name,
+            "is_healthy": values["is_healthy"],
+            "response_time_ms": values["response_time_ms"],
+            "consecutive_failures": values["consecutive_failures"]
+        }
+    
+    async def _probe_provider(
+        self,
+        provider: Provider,
+        health: Optional[ProviderHealth]
+    ) -> Dict:
+        """
+        Send a test request to a provider and compute its new health values.
+        
+        Does not touch the database; ``health`` is only read.
+        
+        Args:
+            provider: Provider to check
+            health: Current health record (None if the provider has none yet)
+            
+        Returns:
+            ProviderHealth column values (``id`` is None for a new record)
+        """
+        logger.debug(f"Checking provider: {provider.name}")
         
         # Perform health check
-        start_time = datetime.utcnow()
+        start_time = time.perf_counter()
         is_healthy = False
         response_time_ms = None
         error_message = None
         
         try:
-            # Create provider instance
-            provider_instance = self.provider_factory.create_provider(
+            # Shared with request routing so the client is pooled once and
+            # closed at shutdown
+            provider_instance = await self.provider_factory.get_provider(
+                provider_id=provider.id,
                 provider_type=provider.type,
                 api_key=provider.api_key,
                 base_url=provider.base_url,
-                timeout=30  # 30 second timeout for health checks
+                timeout=provider.timeout
             )
             
             # Create simple test request
@@ -142,13 +202,14 @@ class HealthCheckService:
                 temperature=0
             )
             
-            # Send request
-            response = await provider_instance.chat_completion(test_request)
+            # Send request, bounded so one slow provider can't stall the cycle
+            response = await asyncio.wait_for(
+                provider_instance.chat_completion(test_request),
+                timeout=self.timeout
+            )
             
             # Calculate response time
-            response_time_ms = int(
-                (datetime.utcnow() - start_time).total_seconds() * 1000
-            )
+            response_time_ms = int((time.perf_counter() - start_time) * 1000)
             
             is_healthy = True
             logger.info(
@@ -166,41 +227,59 @@ class HealthCheckService:
                 extra={"provider": provider.name, "error": error_message}
             )
         
-        # Update health record
-        health.total_checks += 1
-        health.last_check = datetime.utcnow()
-        health.response_time_ms = response_time_ms
-        health.error_message = error_message
+        # Previous state (defaults for a new record)
+        marked_healthy = health.is_healthy if health else True
+        consecutive_failures = (health.consecutive_failures or 0) if health else 0
+        success_rate = health.success_rate if health and health.success_rate is not None else 100.0
         
         if is_healthy:
-            health.is_healthy = True
-            health.successful_checks += 1
-            health.consecutive_failures = 0
+            marked_healthy = True
+            consecutive_failures = 0
         else:
-            health.consecutive_failures += 1
+            consecutive_failures += 1
             
             # Mark as unhealthy if consecutive failures exceed threshold
-            if health.consecutive_failures >= self.max_errors:
-                health.is_healthy = False
+            if consecutive_failures >= self.max_errors:
+                marked_healthy = False
                 logger.warning(
                     f"Provider {provider.name} marked as unhealthy "
-                    f"({health.consecutive_failures} consecutive failures)"
+                    f"({consecutive_failures} consecutive failures)"
                 )
         
-        # Calculate success rate
-        if health.total_checks > 0:
-            health.success_rate = (
-                health.successful_checks / health.total_checks * 100
-            )
+        # Success rate as a moving average over recent checks
+        success_rate = success_rate * 0.9 + (100.0 if is_healthy else 0.0) * 0.1
         
         return {
+            "id": health.id if health else None,
             "provider_id": provider.id,
-            "provider_name": provider.name,
-            "is_healthy": health.is_healthy,
+            "is_healthy": marked_healthy,
+            "last_check": datetime.utcnow(),
             "response_time_ms": response_time_ms,
-            "consecutive_failures": health.consecutive_failures
+            "error_message": error_message,
+            "consecutive_failures": consecutive_failures,
+            "success_rate": success_rate
         }
     
+    async def _save_health_values(self, db: AsyncSession, values: List[Dict]) -> None:
+        """
+        Write health values with one bulk UPDATE and one bulk INSERT.
+        
+        Args:
+            db: Database session (caller commits)
+            values: Rows from :meth:`_probe_provider`
+        """
+        updates = [v for v in values if v["id"] is not None]
+        inserts = [
+            {key: value for key, value in v.items() if key != "id"}
+            for v in values if v["id"] is None
+        ]
+        
+        # Executemany UPDATE keyed by primary key
+        if updates:
+            await db.execute(update(ProviderHealth), updates)
+        if inserts:
+            await db.execute(insert(ProviderHealth), inserts)
+    
     async def manual_check(self, provider_name: str) -> Dict:
         """
         Manually trigger health check for a provider.
@@ -244,4 +323,9 @@ async def start_health_check_service():
         logger.info("Health check service is enabled")
         await health_check_service.start()
     else:
-        logger.info("Health check service is disabled")
\ No newline at end of file
+        logger.info("Health check service is disabled")
+
+
+def stop_health_check_service():
+    """Stop the health check service loop."""
+    health_check_service.stop()
\ No newline at end of file
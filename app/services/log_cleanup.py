@@ -1,5 +1,8 @@
 """
 Log cleanup service for periodic maintenance of request logs.
+
+Cleanup filters on ``request_logs.created_at`` and relies on its index
+(``idx_request_log_created``) to avoid a full table scan per batch.
 """
 import asyncio
 from datetime import datetime, timedelta
@@ -33,7 +36,9 @@ class LogCleanupService:
         """
         self.retention_days = retention_days
         self.cleanup_interval_hours = cleanup_interval_hours
-        self._running = False
+        
+        # Set by stop() to end the loop without waiting out the interval
+        self._stop_event = asyncio.Event()
     
     async def cleanup_old_logs(
         self,
@@ -56,10 +61,29 @@ class LogCleanupService:
         try:
             cutoff_date = datetime.utcnow() - timedelta(days=self.retention_days)
             
-            # Count logs to be deleted
-            count_query = select(RequestLog).where(RequestLog.created_at < cutoff_date)
-            result = await db.execute(count_query)
-            logs_to_delete = len(result.scalars().all())
+            batch_size = settings.log_cleanup_batch_size
+            
+            # Delete old logs in batches, committing each one so no single
+            # write transaction holds the database lock for long. The first
+            # id SELECT doubles as the existence probe: with nothing expired
+            # no DELETE (and so no write lock) is ever issued.
+            logs_to_delete = 0
+            while True:
+                ids_query = (
+                    select(RequestLog.id)
+                    .where(RequestLog.created_at < cutoff_date)
+                    .limit(batch_size)
+                )
+                ids = (await db.execute(ids_query)).scalars().all()
+                if not ids:
+                    break
+                
+                await db.execute(delete(RequestLog).where(RequestLog.id.in_(ids)))
+                await db.commit()
+                logs_to_delete += len(ids)
+                
+                # Let other tasks run between batches
+                await asyncio.sleep(0)
             
             if logs_to_delete == 0:
                 logger.info("No old logs to clean up")
@@ -69,11 +93,6 @@ class LogCleanupService:
                     "retention_days": self.retention_days
                 }
             
-            # Delete old logs
-            delete_query = delete(RequestLog).where(RequestLog.created_at < cutoff_date)
-            await db.execute(delete_query)
-            await db.commit()
-            
             logger.info(
                 f"Cleaned up {logs_to_delete} old request logs",
                 extra={
@@ -100,21 +119,21 @@ class LogCleanupService:
     
     async def run_periodic_cleanup(self):
         """Run cleanup task periodically in background."""
-        self._running = True
+        self._stop_event.clear()
         logger.info(
             f"Starting periodic log cleanup service "
             f"(retention: {self.retention_days} days, "
             f"interval: {self.cleanup_interval_hours} hours)"
         )
         
-        while self._running:
+        while not self._stop_event.is_set():
             try:
                 # Perform cleanup
                 result = await self.cleanup_old_logs()
                 logger.info(f"Periodic cleanup completed: {result}")
                 
                 # Wait for next cleanup interval
-                await asyncio.sleep(self.cleanup_interval_hours * 3600)
+                wait_seconds = self.cleanup_interval_hours * 3600
             
             except asyncio.CancelledError:
                 logger.info("Log cleanup service cancelled")
@@ -123,11 +142,17 @@ class LogCleanupService:
             except Exception as e:
                 logger.error(f"Error in periodic cleanup: {str(e)}", exc_info=True)
                 # Wait a bit before retrying
-                await asyncio.sleep(300)  # 5 minutes
+                wait_seconds = 300  # 5 minutes
+            
+            # Sleep until the next run, waking early on stop
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=wait_seconds)
+            except asyncio.TimeoutError:
+                pass
     
     def stop(self):
         """Stop the cleanup service."""
-        self._running = False
+        self._stop_event.set()
 
 
 # Global cleanup service instance
@@ -0,0 +1,135 @@
+"""
+Background writer batching request log inserts.
+"""
+import asyncio
+from typing import Any, Coroutine, Dict, List, Optional, Set
+
+from sqlalchemy import insert
+
+from app.core.database import AsyncSessionLocal
+from app.core.logger import get_logger
+from app.models.request_log import RequestLog
+
+logger = get_logger(__name__)
+
+# Maximum log entries written in one transaction
+BATCH_MAX = 256
+
+# Seconds to wait for more entries before flushing a partial batch
+FLUSH_INTERVAL = 0.05
+
+# Pending entries beyond this are dropped rather than growing without bound
+QUEUE_MAX = 10000
+
+
+class LogWriter:
+    """
+    Queue of request log entries drained by a single background task.
+
+    Request handlers call :meth:`enqueue` instead of committing their own
+    transaction, so log writes are taken off the request path and many
+    entries share one commit.
+    """
+
+    def __init__(self):
+        """Initialize log writer."""
+        self.queue: Optional[asyncio.Queue] = None
+
+        # Tasks preparing log entries, drained before the final flush
+        self._tasks: Set[asyncio.Task] = set()
+
+    def enqueue(self, log_entry: Dict[str, Any]) -> None:
+        """
+        Queue a log entry for writing (never blocks).
+
+        Args:
+            log_entry: RequestLog column values
+        """
+        if self.queue is None:
+            logger.warning("Log writer not running, dropping request log")
+            return
+
+        try:
+            self.queue.put_nowait(log_entry)
+        except asyncio.QueueFull:
+            logger.warning("Request log queue full, dropping request log")
+
+    def submit(self, coro: Coroutine) -> None:
+        """
+        Run a coroutine that prepares and enqueues log entries in the background.
+
+        The task is tracked so shutdown waits for it before the final flush.
+
+        Args:
+            coro: Coroutine to run
+        """
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def run(self) -> None:
+        """Drain the queue in batches until cancelled, flushing what is left."""
+        self.queue = asyncio.Queue(maxsize=QUEUE_MAX)
+        logger.info("Request log writer started")
+
+        # Entries taken off the queue but not yet written; flushed on shutdown
+        batch: List[Dict[str, Any]] = []
+        try:
+            while True:
+                batch.append(await self.queue.get())
+
+                # Collect more entries until the batch is full or the queue stays idle
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + FLUSH_INTERVAL
+                while len(batch) < BATCH_MAX:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                await self._write(batch)
+                batch = []
+
+        except asyncio.CancelledError:
+            # Let in-flight log preparation finish, then flush the unwritten
+            # batch (a cancelled write is rolled back) with the queued entries
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+            pending = batch
+            while not self.queue.empty():
+                pending.append(self.queue.get_nowait())
+            if pending:
+                await self._write(pending)
+            logger.info("Request log writer stopped")
+            raise
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        """
+        Insert a batch of log entries in one transaction.
+
+        Rows are grouped by the columns they set (success and failure
+        entries differ) and each group is one executemany INSERT, skipping
+        ORM object construction. Failures are logged and the batch is
+        dropped.
+
+        Args:
+            batch: RequestLog column values to insert
+        """
+        groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+        for row in batch:
+            groups.setdefault(frozenset(row), []).append(row)
+
+        try:
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    for rows in groups.values():
+                        await session.execute(insert(RequestLog), rows)
+        except Exception as e:
+            logger.error("Failed to write %d request logs: %s", len(batch), e)
+
+
+# Global log writer instance
+log_writer = LogWriter()
@@ -1,23 +1,160 @@
 """
 Request router for handling LLM API requests with failover.
 """
-import time
 import asyncio
-import json
-from typing import Optional, AsyncGenerator, List, Dict, Any
+import logging
+import random
+import time
+from dataclasses import dataclass, asdict
+from typing import Optional, AsyncGenerator, ClassVar, List, Dict, Any, Set, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.cache import RedisCache
+from app.core.cache import (
+    RedisCache,
+    provider_snapshot_cache_key,
+    circuit_open_cache_key,
+    circuit_failures_cache_key
+)
 from app.core.logger import get_logger
 from app.core.config import settings
+from app.core.database import AsyncSessionLocal
 from app.api.schemas import ChatCompletionRequest, ChatCompletionResponse
 from app.providers.factory import ProviderFactory
-from app.models.request_log import RequestLog
+from app.providers.exceptions import (
+    ProviderError,
+    ProviderFatalError,
+    CircuitOpenError,
+    to_provider_error,
+    error_reason
+)
 from app.models.provider import Provider
-from sqlalchemy import select
+from app.services.log_writer import log_writer
+from sqlalchemy import select, bindparam, lambda_stmt
 
 logger = get_logger(__name__)
 
+# Seconds a provider snapshot stays cached (Redis and in-process)
+PROVIDER_CACHE_TTL = 30
+
+# Seconds allowed for a connection prewarm request
+PREWARM_TIMEOUT = 5
+
+# Chunks a provider stream may read ahead of the client
+STREAM_BUFFER_SIZE = 32
+
+# Marks the end of a buffered stream
+_STREAM_END = object()
+
+# Fire-and-forget tasks, referenced until done so they aren't collected
+_background_tasks: Set[asyncio.Task] = set()
+
+# Enabled provider's connection settings by name; compiled once and reused
+_PROVIDER_SNAPSHOT_STMT = lambda_stmt(
+    lambda: select(
+        Provider.id,
+        Provider.type,
+        Provider.api_key,
+        Provider.base_url,
+        Provider.timeout
+    ).where(
+        Provider.name == bindparam("name"),
+        Provider.enabled == True
+    ).limit(1)
+)
+
+
+def _spawn(coro) -> None:
+    """Run a coroutine as a background task, keeping a reference until it finishes."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def _buffered(
+    stream: AsyncGenerator[bytes, None],
+    maxsize: int = STREAM_BUFFER_SIZE
+) -> AsyncGenerator[bytes, None]:
+    """
+    Read a stream in a background task through a bounded queue.
+    
+    The upstream connection is drained at its own pace while the client
+    consumes independently, up to ``maxsize`` chunks ahead. Upstream
+    errors are re-raised to the consumer; closing the consumer cancels
+    the upstream read and closes ``stream``, releasing its HTTP response
+    without waiting for garbage collection.
+    
+    Args:
+        stream: Provider chunk stream
+        maxsize: Maximum number of chunks buffered
+        
+    Yields:
+        Chunks in upstream order
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+    
+    async def pump() -> None:
+        try:
+            async for chunk in stream:
+                await queue.put(chunk)
+        except Exception as e:
+            await queue.put(e)
+        else:
+            await queue.put(_STREAM_END)
+    
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _STREAM_END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        task.cancel()
+        # Wait for the pump to stop (the generator can't be closed while
+        # it is running), then close it
+        await asyncio.gather(task, return_exceptions=True)
+        await stream.aclose()
+
+
+def _backoff_delay(attempt: int) -> float:
+    """
+    Exponential backoff with jitter for a retry attempt.
+    
+    Jitter spreads retries of concurrent requests so they don't hit a
+    recovering upstream in lockstep.
+    
+    Args:
+        attempt: Zero-based attempt number that just failed
+        
+    Returns:
+        Seconds to wait before the next attempt
+    """
+    jitter = settings.retry_jitter
+    delay = settings.retry_base_delay * (2 ** attempt) * (1 - jitter + 2 * jitter * random.random())
+    return min(delay, settings.retry_max_delay)
+
+
+class AllProvidersFailedError(Exception):
+    """Raised when the primary provider and every fallback failed."""
+    
+    def __init__(self, errors: List[Tuple[str, str]]):
+        summary = "; ".join(f"{name}: {error}" for name, error in errors)
+        super().__init__(f"All providers failed. Errors: {summary}")
+        self.errors = errors
+
+
+@dataclass
+class ProviderSnapshot:
+    """Provider fields needed to send a request (safe to cache, unlike ORM objects)."""
+    
+    id: int
+    type: str
+    api_key: str
+    base_url: Optional[str]
+    timeout: int
+
 
 class RequestRouter:
     """
@@ -30,6 +167,12 @@ class RequestRouter:
     - Cost calculation
     """
     
+    # Shared by all routers (one is created per request)
+    provider_factory: ClassVar[ProviderFactory] = ProviderFactory()
+    
+    # Process-wide provider snapshots with their expiry, by provider name
+    _provider_cache: ClassVar[Dict[str, Tuple[ProviderSnapshot, float]]] = {}
+    
     def __init__(self, db: AsyncSession, cache: RedisCache):
         """
         Initialize request router.
@@ -40,7 +183,6 @@ class RequestRouter:
         """
         self.db = db
         self.cache = cache
-        self.provider_factory = ProviderFactory()
     
     async def route_request(
         self,
@@ -55,7 +197,8 @@ class RequestRouter:
         Route request to provider with intelligent failover support.
         
         Tries the primary provider first, then automatically falls back to
-        alternative providers if the primary fails.
+        alternative providers if the primary fails. When ``request.hedge_ms``
+        is set, the first fallback is raced against the primary instead.
         
         Args:
             provider_name: Primary provider name
@@ -69,35 +212,57 @@ class RequestRouter:
             Chat completion response
             
         Raises:
-            Exception: If all providers fail
+            AllProvidersFailedError: If all providers fail
         """
-        start_time = time.time()
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
         
         # Build provider list: primary + fallbacks
         provider_names = [provider_name]
         if fallback_providers:
             provider_names.extend(fallback_providers)
         
+        last_errors: List[Tuple[str, str]] = []
+        
+        # Hedged: race primary and first fallback, then continue with the rest
+        if fallback_providers and request.hedge_ms is not None:
+            response = await self._race_providers(
+                provider_names[:2],
+                request=request,
+                request_id=request_id,
+                start_time=start_time,
+                api_key=api_key,
+                client_ip=client_ip,
+                last_errors=last_errors
+            )
+            if response is not None:
+                return response
+            provider_names = provider_names[2:]
+        
+        # One log context for the whole loop, updated per provider
+        log_extra = {"request_id": request_id, "provider": None, "is_fallback": False}
+        
         # Try each provider in sequence
-        last_errors = {}
-        for current_provider_name in provider_names:
+        for index, current_provider_name in enumerate(provider_names):
+            log_extra["provider"] = current_provider_name
+            log_extra["is_fallback"] = current_provider_name != provider_name
             try:
                 logger.info(
-                    f"Attempting provider: {current_provider_name}",
-                    extra={
-                        "request_id": request_id,
-                        "provider": current_provider_name,
-                        "is_fallback": current_provider_name != provider_name
-                    }
+                    "Attempting provider: %s", current_provider_name,
+                    extra=log_extra
                 )
                 
+                next_provider = (
+                    provider_names[index + 1] if index + 1 < len(provider_names) else None
+                )
                 response = await self._try_provider(
                     provider_name=current_provider_name,
                     request=request,
                     request_id=request_id,
                     start_time=start_time,
                     api_key=api_key,
-                    client_ip=client_ip
+                    client_ip=client_ip,
+                    prewarm_provider=next_provider
                 )
                 
                 # Success! Add provider info and return
@@ -105,29 +270,99 @@ class RequestRouter:
                 return response
             
             except Exception as e:
-                last_errors[current_provider_name] = str(e)
+                reason = error_reason(e)
+                last_errors.append((current_provider_name, reason))
+                log_extra["error"] = reason
                 logger.warning(
-                    f"Provider {current_provider_name} failed: {str(e)}",
-                    extra={
-                        "request_id": request_id,
-                        "provider": current_provider_name,
-                        "error": str(e)
-                    }
+                    "Provider %s failed: %s", current_provider_name, reason,
+                    extra=log_extra
                 )
+                log_extra.pop("error")
                 # Continue to next provider
         
-        # All providers failed
-        error_summary = "; ".join([f"{name}: {err}" for name, err in last_errors.items()])
-        logger.error(
-            f"All providers failed for request {request_id}",
-            extra={
-                "request_id": request_id,
-                "providers_tried": list(last_errors.keys()),
-                "errors": last_errors
-            }
-        )
+        # All providers failed (logged once by the caller)
+        raise AllProvidersFailedError(last_errors)
+    
+    async def _race_providers(
+        self,
+        provider_names: List[str],
+        request: ChatCompletionRequest,
+        request_id: str,
+        start_time: float,
+        api_key: Optional[str],
+        client_ip: Optional[str],
+        last_errors: List[Tuple[str, str]]
+    ) -> Optional[ChatCompletionResponse]:
+        """
+        Race the primary provider against a hedged fallback.
+        
+        The fallback starts once ``request.hedge_ms`` has passed without a
+        response, or immediately if the primary fails first. The first
+        successful response wins and the other attempt is cancelled. Each
+        attempt uses its own database session, since the two run
+        concurrently and may be cancelled mid-query.
+        
+        Args:
+            provider_names: Primary and fallback provider names
+            request: Chat completion request
+            request_id: Request ID
+            start_time: Request start time (event loop clock)
+            api_key: User API key
+            client_ip: Client IP
+            last_errors: Collects (provider, error message) per failed provider
+            
+        Returns:
+            Winning response, or None if both providers failed
+        """
+        primary_name, fallback_name = provider_names
         
-        raise Exception(f"All providers failed. Errors: {error_summary}")
+        async def attempt(name: str) -> ChatCompletionResponse:
+            async with AsyncSessionLocal() as db:
+                return await self._try_provider(
+                    provider_name=name,
+                    request=request,
+                    request_id=request_id,
+                    start_time=start_time,
+                    api_key=api_key,
+                    client_ip=client_ip,
+                    db=db
+                )
+        
+        def start(name: str) -> asyncio.Task:
+            return asyncio.create_task(attempt(name))
+        
+        tasks = {start(primary_name): primary_name}
+        done, _ = await asyncio.wait(tasks, timeout=request.hedge_ms / 1000)
+        if not done or next(iter(done)).exception() is not None:
+            logger.info(
+                "Hedging request to fallback provider: %s", fallback_name,
+                extra={"request_id": request_id, "provider": fallback_name}
+            )
+            tasks[start(fallback_name)] = fallback_name
+        
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = tasks[task]
+                    error = task.exception()
+                    if error is None:
+                        response = task.result()
+                        response.provider = name
+                        return response
+                    
+                    reason = error_reason(error)
+                    last_errors.append((name, reason))
+                    logger.warning(
+                        "Provider %s failed: %s", name, reason,
+                        extra={"request_id": request_id, "provider": name, "error": reason}
+                    )
+            return None
+        finally:
+            # Cancel the losing attempt
+            for task in pending:
+                task.cancel()
     
     async def _try_provider(
         self,
@@ -136,7 +371,9 @@ class RequestRouter:
         request_id: str,
         start_time: float,
         api_key: Optional[str],
-        client_ip: Optional[str]
+        client_ip: Optional[str],
+        prewarm_provider: Optional[str] = None,
+        db: Optional[AsyncSession] = None
     ) -> ChatCompletionResponse:
         """
         Try a single provider with retries.
@@ -145,46 +382,65 @@ class RequestRouter:
             provider_name: Provider name
             request: Chat completion request
             request_id: Request ID
-            start_time: Request start time
+            start_time: Request start time (event loop clock)
             api_key: User API key
             client_ip: Client IP
+            prewarm_provider: Next provider in the failover order, whose
+                connection is opened once the first attempt fails
+            db: Session for the provider lookup (defaults to the router's)
             
         Returns:
             Chat completion response
             
         Raises:
-            Exception: If all retry attempts fail
+            ProviderError: If all retry attempts fail (``ProviderFatalError``
+                if the last failure cannot succeed on retry)
         """
         retry_count = request.retry_count or settings.max_retry_count
+        loop = asyncio.get_running_loop()
+        
+        # Fail fast while the provider is known to be failing
+        circuit_open, has_failures = await self._circuit_state(provider_name)
+        if circuit_open:
+            raise CircuitOpenError(provider_name)
         
         # Get provider from database
-        provider = await self._get_provider(provider_name)
+        provider = await self._get_provider(provider_name, db)
         if not provider:
-            raise Exception(f"Provider {provider_name} not found or disabled")
+            raise ProviderFatalError("not_found", f"Provider {provider_name} not found or disabled")
         
-        last_error = None
+        last_error: Optional[ProviderError] = None
+        log_extra = {"request_id": request_id, "provider": provider_name, "attempt": 0}
         
         # Try with retries (same provider, different attempts)
         for attempt in range(retry_count + 1):
             try:
-                logger.debug(
-                    f"Provider {provider_name} attempt {attempt + 1}/{retry_count + 1}",
-                    extra={"request_id": request_id}
-                )
+                log_extra["attempt"] = attempt + 1
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        "Provider %s attempt %d/%d",
+                        provider_name, attempt + 1, retry_count + 1,
+                        extra=log_extra
+                    )
                 
-                # Create provider instance
-                provider_instance = self.provider_factory.create_provider(
+                # Get shared provider instance (reuses pooled connections)
+                provider_instance = await self.provider_factory.get_provider(
+                    provider_id=provider.id,
                     provider_type=provider.type,
                     api_key=provider.api_key,
                     base_url=provider.base_url,
-                    timeout=request.timeout or provider.timeout
+                    timeout=provider.timeout
                 )
                 
                 # Send request
                 response = await provider_instance.chat_completion(request)
                 
+                # Reset the failure count only if there is one to reset
+                if has_failures:
+                    await self.cache.delete(circuit_failures_cache_key(provider_name))
+                
                 # Log successful request
-                latency_ms = int((time.time() - start_time) * 1000)
+                latency_ms = int((loop.time() - start_time) * 1000)
                 await self._log_request(
                     provider_id=provider.id,
                     request=request,
@@ -197,29 +453,46 @@ class RequestRouter:
                 return response
             
             except Exception as e:
-                last_error = e
-                logger.debug(
-                    f"Attempt {attempt + 1} failed: {str(e)}",
-                    extra={"request_id": request_id, "provider": provider_name}
-                )
+                last_error = to_provider_error(e)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        "Attempt %d failed: %s (%s)",
+                        attempt + 1, last_error.code, last_error.short_reason,
+                        extra=log_extra
+                    )
+                
+                # Open a connection to the next provider in case we fail over
+                if attempt == 0 and prewarm_provider:
+                    _spawn(self._prewarm(prewarm_provider))
+                
+                # Don't retry errors that would fail again
+                if isinstance(last_error, ProviderFatalError):
+                    break
+                
+                # Stop retrying once the failure trips the circuit breaker
+                if await self._record_failure(provider_name):
+                    break
+                has_failures = True
                 
-                # Wait before retry (exponential backoff)
+                # Wait before retry (exponential backoff with jitter)
                 if attempt < retry_count:
-                    wait_time = min(2 ** attempt, 10)  # Max 10 seconds
-                    await asyncio.sleep(wait_time)
+                    await asyncio.sleep(_backoff_delay(attempt))
         
         # All retries failed for this provider
-        latency_ms = int((time.time() - start_time) * 1000)
+        latency_ms = int((loop.time() - start_time) * 1000)
         await self._log_failed_request(
             provider_id=provider.id,
             request=request,
-            error=str(last_error),
+            error=last_error.short_reason,
             latency_ms=latency_ms,
             api_key=api_key,
             client_ip=client_ip
         )
         
-        raise Exception(f"Provider {provider_name} failed after {retry_count + 1} attempts: {str(last_error)}")
+        raise type(last_error)(
+            last_error.code,
+            f"failed after {attempt + 1} attempts: {last_error.short_reason}"
+        ) from last_error
     
     async def route_streaming_request(
         self,
@@ -228,7 +501,7 @@ class RequestRouter:
         request_id: str,
         api_key: Optional[str] = None,
         client_ip: Optional[str] = None
-    ) -> AsyncGenerator[str, None]:
+    ) -> AsyncGenerator[bytes, None]:
         """
         Route streaming request to provider with Token usage tracking.
         
@@ -242,45 +515,53 @@ class RequestRouter:
         Yields:
             Server-sent event chunks
         """
-        start_time = time.time()
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        
+        # Fail fast while the provider is known to be failing
+        circuit_open, _ = await self._circuit_state(provider_name)
+        if circuit_open:
+            raise CircuitOpenError(provider_name)
         
         # Get provider
         provider = await self._get_provider(provider_name)
         if not provider:
-            raise Exception(f"Provider {provider_name} not found")
-        
-        # Track usage info from streaming response
-        usage_info: Optional[Dict[str, Any]] = None
+            raise ProviderFatalError("not_found", f"Provider {provider_name} not found")
         
         try:
-            # Create provider instance
-            provider_instance = self.provider_factory.create_provider(
+            # Get shared provider instance (reuses pooled connections)
+            provider_instance = await self.provider_factory.get_provider(
+                provider_id=provider.id,
                 provider_type=provider.type,
                 api_key=provider.api_key,
                 base_url=provider.base_url,
-                timeout=request.timeout or provider.timeout
+                timeout=provider.timeout
             )
             
-            # Stream response - logging is handled in chat.py's finally block
-            async for chunk in provider_instance.chat_completion_stream(request):
+            # Stream response - logging is handled in chat.py's finally block.
+            # Buffered so a slow client doesn't hold the upstream connection open.
+            async for chunk in _buffered(provider_instance.chat_completion_stream(request)):
                 yield chunk
         
         except Exception as e:
+            error = to_provider_error(e)
+            if not isinstance(error, ProviderFatalError):
+                await self._record_failure(provider_name)
             logger.error(
-                f"Streaming request failed on {provider_name}: {str(e)}",
+                "Streaming request failed on %s: %s", provider_name, error.short_reason,
                 extra={
                     "request_id": request_id,
                     "provider": provider_name,
-                    "error": str(e)
+                    "error": error.code
                 }
             )
             
             # Log failed request
-            latency_ms = int((time.time() - start_time) * 1000)
+            latency_ms = int((loop.time() - start_time) * 1000)
             await self._log_failed_request(
                 provider_id=provider.id,
                 request=request,
-                error=str(e),
+                error=error.short_reason,
                 latency_ms=latency_ms,
                 api_key=api_key,
                 client_ip=client_ip
@@ -288,26 +569,129 @@ class RequestRouter:
             
             raise
     
-    async def _get_provider(self, provider_name: str) -> Optional[Provider]:
+    async def _prewarm(self, provider_name: str) -> None:
         """
-        Get provider from database with caching.
+        Open a pooled connection to a provider ahead of a possible failover.
+        
+        Sends a HEAD request to the provider's base URL through the shared
+        instance, so the TCP/TLS handshake is done before the request is
+        sent there. Failures are ignored.
+        
+        Args:
+            provider_name: Provider name
+        """
+        try:
+            # Own session: this runs alongside the request's use of self.db
+            async with AsyncSessionLocal() as db:
+                provider = await self._get_provider(provider_name, db)
+            if not provider:
+                return
+            
+            provider_instance = await self.provider_factory.get_provider(
+                provider_id=provider.id,
+                provider_type=provider.type,
+                api_key=provider.api_key,
+                base_url=provider.base_url,
+                timeout=provider.timeout
+            )
+            client = await provider_instance.get_client()
+            await client.head(provider_instance.base_url, timeout=PREWARM_TIMEOUT)
+        except Exception as e:
+            logger.debug("Prewarm of %s failed: %s", provider_name, e)
+    
+    async def _circuit_state(self, provider_name: str) -> Tuple[bool, bool]:
+        """
+        Check a provider's circuit breaker in one Redis round trip.
         
         Args:
             provider_name: Provider name
             
         Returns:
-            Provider instance or None
+            Whether the circuit is open (requests should be skipped), and
+            whether recent failures are being counted
         """
-        # Query database directly (caching Provider ORM objects is problematic)
-        query = select(Provider).where(
-            Provider.name == provider_name,
-            Provider.enabled == True
+        circuit_open, has_failures = await self.cache.exists_many(
+            circuit_open_cache_key(provider_name),
+            circuit_failures_cache_key(provider_name)
         )
-        result = await self.db.execute(query)
-        provider = result.scalar_one_or_none()
+        return circuit_open, has_failures
+    
+    async def _record_failure(self, provider_name: str) -> bool:
+        """
+        Count a failed attempt and open the circuit at the threshold.
+        
+        Failures are counted within ``settings.circuit_breaker_window``
+        seconds; an open circuit lasts ``settings.circuit_breaker_cooldown``.
         
+        Args:
+            provider_name: Provider name
+            
+        Returns:
+            True if this failure opened the circuit
+        """
+        failures = await self.cache.increment(
+            circuit_failures_cache_key(provider_name),
+            ttl=settings.circuit_breaker_window
+        )
+        if failures is None or failures < settings.circuit_breaker_threshold:
+            return False
+        
+        await self.cache.set(
+            circuit_open_cache_key(provider_name),
+            1,
+            ttl=settings.circuit_breaker_cooldown
+        )
+        await self.cache.delete(circuit_failures_cache_key(provider_name))
+        logger.warning(
+            "Circuit breaker opened for provider %s", provider_name,
+            extra={"provider": provider_name, "failures": failures}
+        )
+        return True
+    
+    async def _get_provider(
+        self,
+        provider_name: str,
+        db: Optional[AsyncSession] = None
+    ) -> Optional[ProviderSnapshot]:
+        """
+        Get enabled provider settings, cached briefly in-process and in Redis.
+        
+        A fresh in-process entry is returned without touching Redis or the
+        database, so bursts of requests to one provider share a single read.
+        
+        Args:
+            provider_name: Provider name
+            db: Session to query on a cache miss (defaults to the router's)
+            
+        Returns:
+            Provider snapshot or None if not found or disabled
+        """
+        now = time.monotonic()
+        entry = self._provider_cache.get(provider_name)
+        if entry and entry[1] > now:
+            return entry[0]
+        
+        cache_key = provider_snapshot_cache_key(provider_name)
+        cached = await self.cache.get(cache_key)
+        if cached:
+            provider = ProviderSnapshot(**cached)
+        else:
+            result = await (db or self.db).execute(_PROVIDER_SNAPSHOT_STMT, {"name": provider_name})
+            row = result.mappings().first()
+            if row is None:
+                return None
+            
+            provider = ProviderSnapshot(**row)
+            await self.cache.set(cache_key, asdict(provider), ttl=PROVIDER_CACHE_TTL)
+        
+        RequestRouter._provider_cache[provider_name] = (provider, now + PROVIDER_CACHE_TTL)
         return provider
     
+    @classmethod
+    def invalidate_provider_cache(cls) -> None:
+        """Drop all in-process provider snapshots."""
+        cls._provider_cache.clear()
+    
     async def _log_request(
         self,
         provider_id: int,
@@ -318,7 +702,7 @@ class RequestRouter:
         client_ip: Optional[str]
     ):
         """
-        Log successful request to database.
+        Queue successful request log for the background writer.
         
         Args:
             provider_id: Provider ID
@@ -329,7 +713,7 @@ class RequestRouter:
             client_ip: Client IP address
         """
         try:
-            log_entry = RequestLog(
+            log_entry = dict(
                 provider_id=provider_id,
                 model=request.model,
                 endpoint="/v1/chat/completions",
@@ -343,12 +727,10 @@ class RequestRouter:
                 ip_address=client_ip
             )
             
-            self.db.add(log_entry)
-            await self.db.commit()
+            log_writer.enqueue(log_entry)
         
         except Exception as e:
             logger.error(f"Failed to log request: {str(e)}")
-            await self.db.rollback()
     
     async def _log_streaming_request(
         self,
@@ -371,7 +753,7 @@ class RequestRouter:
             client_ip: Client IP address
         """
         try:
-            log_entry = RequestLog(
+            log_entry = dict(
                 provider_id=provider_id,
                 model=request.model,
                 endpoint="/v1/chat/completions",
@@ -385,8 +767,7 @@ class RequestRouter:
                 ip_address=client_ip
             )
             
-            self.db.add(log_entry)
-            await self.db.commit()
+            log_writer.enqueue(log_entry)
             
             if usage_info:
                 logger.debug(
@@ -400,7 +781,6 @@ class RequestRouter:
         
         except Exception as e:
             logger.error(f"Failed to log streaming request: {str(e)}")
-            await self.db.rollback()
     
     async def _log_failed_request(
         self,
@@ -412,7 +792,7 @@ class RequestRouter:
         client_ip: Optional[str]
     ):
         """
-        Log failed request to database.
+        Queue failed request log for the background writer.
         
         Args:
             provider_id: Provider ID
@@ -423,7 +803,7 @@ class RequestRouter:
             client_ip: Client IP address
         """
         try:
-            log_entry = RequestLog(
+            log_entry = dict(
                 provider_id=provider_id,
                 model=request.model,
                 endpoint="/v1/chat/completions",
@@ -435,9 +815,7 @@ class RequestRouter:
                 ip_address=client_ip
             )
             
-            self.db.add(log_entry)
-            await self.db.commit()
+            log_writer.enqueue(log_entry)
         
         except Exception as e:
-            logger.error(f"Failed to log failed request: {str(e)}")
-            await self.db.rollback()
\ No newline at end of file
+            logger.error(f"Failed to log failed request: {str(e)}")
\ No newline at end of file
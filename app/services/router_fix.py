@@ -2,6 +2,10 @@
 修复后的 route_streaming_request 方法
 复制这段代码替换 router.py 中的对应方法
 """
+from collections import deque
+
+import orjson
+
 
 async def route_streaming_request(
     self,
@@ -34,8 +38,9 @@ async def route_streaming_request(
         raise Exception(f"Provider {provider_name} not found")
     
     # Track usage info and stream state
+    # usage 常在 [DONE] 之前的倒数第二个事件里, 只保留最后几个数据帧
     usage_info: Optional[Dict[str, Any]] = None
-    last_chunk: Optional[str] = None
+    tail: deque = deque(maxlen=3)
     stream_error: Optional[Exception] = None
     
     try:
@@ -47,12 +52,12 @@ async def route_streaming_request(
             timeout=request.timeout or provider.timeout
         )
         
-        # Stream response and track last chunk
+        # Stream response and track the final data chunks
         try:
             async for chunk in provider_instance.chat_completion_stream(request):
-                # Track the last valid chunk (not [DONE])
-                if chunk.startswith("data: ") and not chunk.startswith("data: [DONE]"):
-                    last_chunk = chunk
+                # Track the last valid chunks (not [DONE])
+                if chunk.startswith(b"data: ") and not chunk.startswith(b"data: [DONE]"):
+                    tail.append(chunk)
                 
                 yield chunk
         except Exception as e:
@@ -86,11 +91,11 @@ async def route_streaming_request(
     finally:
         # CRITICAL: This block ALWAYS executes after generator completes
         if not stream_error:
-            # Extract usage from last chunk
-            if last_chunk:
+            # Extract usage from the latest chunk that mentions it
+            usage_chunk = next((c for c in reversed(tail) if b'"usage"' in c), None)
+            if usage_chunk:
                 try:
-                    data_str = last_chunk[6:].strip()
-                    data = json.loads(data_str)
+                    data = orjson.loads(usage_chunk[6:].strip())
                     
                     if "usage" in data:
                         usage = data["usage"]
@@ -104,7 +109,7 @@ async def route_streaming_request(
                                     "total_tokens": usage.get("total_tokens")
                                 }
                             )
-                except (json.JSONDecodeError, KeyError) as e:
+                except (orjson.JSONDecodeError, KeyError) as e:
                     logger.warning(f"Failed to extract usage: {str(e)}")
             
             # Log successful streaming request
@@ -1,15 +1,38 @@
 """
 Token estimation service for providers that don't return usage info.
 """
-import re
-from typing import List, Dict, Any
+import string
+from typing import List, Any
+
+# Maps ASCII letters, digits, punctuation and whitespace to \x01 so
+# str.translate + str.count classify a whole string in C. Any literal \x01
+# in the input is remapped so it isn't counted.
+_ASCII_TABLE = str.maketrans({
+    **{char: "\x01" for char in string.printable},
+    "\x01": "\x02",
+})
+
+# Tokens added per message for role and structure
+MESSAGE_OVERHEAD_TOKENS = 10
+
+
+def _estimate_text_tokens(text: str) -> float:
+    """
+    Rough token count for text.
+    
+    - English/ASCII: ~4 chars = 1 token
+    - Chinese and other non-ASCII: ~1.5 chars = 1 token
+    """
+    english_chars = text.translate(_ASCII_TABLE).count("\x01")
+    other_chars = len(text) - english_chars
+    return (english_chars / 4.0) + (other_chars / 1.5)
 
 
 class TokenEstimator:
     """Estimate token usage when provider doesn't return it."""
     
     @staticmethod
-    def estimate_messages_tokens(messages: List[Dict[str, Any]]) -> int:
+    def estimate_messages_tokens(messages: List[Any]) -> int:
         """
         Estimate tokens for input messages.
         
@@ -17,23 +40,22 @@ class TokenEstimator:
         - English: ~4 chars = 1 token
         - Chinese: ~1.5 chars = 1 token
         - Add overhead for message structure
-        """
-        total_chars = 0
         
-        for msg in messages:
-            content = msg.get("content", "")
-            if isinstance(content, str):
-                total_chars += len(content)
-            
-            # Add overhead for role and structure (~10 tokens per message)
-            total_chars += 40  # ~10 tokens
+        Args:
+            messages: Messages as dicts or ChatMessage objects
         
-        # Mixed estimation
-        english_chars = len(re.findall(r'[a-zA-Z0-9\s\p{P}]', str(total_chars)))
-        chinese_chars = total_chars - english_chars
+        Returns:
+            Estimated token count
+        """
+        contents = (
+            msg.get("content") if isinstance(msg, dict) else getattr(msg, "content", None)
+            for msg in messages
+        )
+        text = "".join(content for content in contents if isinstance(content, str))
         
         estimated_tokens = int(
-            (english_chars / 4.0) + (chinese_chars / 1.5)
+            _estimate_text_tokens(text)
+            + MESSAGE_OVERHEAD_TOKENS * len(messages)
         )
         
         return max(estimated_tokens, 10)  # Minimum 10 tokens
@@ -45,20 +67,13 @@ class TokenEstimator:
         
         Args:
             content: Response content string
-            
+        
         Returns:
             Estimated token count
         """
         if not content:
             return 0
         
-        # Count different character types
-        english_chars = len(re.findall(r'[a-zA-Z0-9\s]', content))
-        chinese_chars = len(content) - english_chars
-        
-        # Estimation formula
-        estimated_tokens = int(
-            (english_chars / 4.0) + (chinese_chars / 1.5)
-        )
+        estimated_tokens = int(_estimate_text_tokens(content))
         
-        return max(estimated_tokens, 1)
\ No newline at end of file
+        return max(estimated_tokens, 1)
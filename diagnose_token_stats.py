@@ -6,10 +6,10 @@ Token 统计诊断工具
 import asyncio
 import sys
 from sqlalchemy import select, func
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
 from datetime import datetime, timedelta
 
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, close_db
 from app.models.request_log import RequestLog
 from app.models.provider import Provider
 
@@ -17,20 +17,10 @@ from app.models.provider import Provider
 async def diagnose_token_stats():
     """诊断 Token 统计问题"""
     
-    # 读取数据库配置
-    try:
-        from app.core.config import settings
-        database_url = settings.database_url
-    except:
-        database_url = "sqlite+aiosqlite:///./llm_orchestrator.db"
-    
-    print(f"🔍 连接数据库: {database_url}\n")
-    
-    # 创建数据库引擎
-    engine = create_async_engine(database_url, echo=False)
-    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    print(f"🔍 连接数据库: {settings.database_url}\n")
     
-    async with async_session() as session:
+    # 复用应用的数据库引擎和连接池
+    async with AsyncSessionLocal() as session:
         # 1. 检查请求日志总数
         query = select(func.count(RequestLog.id))
         result = await session.execute(query)
@@ -140,6 +130,8 @@ async def main():
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        await close_db()
     
     print("=" * 100)
     print("诊断完成")
@@ -4,7 +4,9 @@ LLM Orchestrator 客户端使用示例
 展示如何使用 Python 客户端调用 API
 """
 import asyncio
+import sys
 import httpx
+import orjson
 from typing import AsyncGenerator
 
 
@@ -25,16 +27,30 @@ class LLMOrchestratorClient:
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
+        
+        # 所有请求共用一个 HTTP 客户端, 复用连接池 (避免每次调用都重新握手)
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self.headers,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        )
+    
+    async def aclose(self):
+        """关闭 HTTP 客户端"""
+        await self._client.aclose()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
     
     async def list_models(self):
         """获取可用模型列表"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/v1/models",
-                headers=self.headers
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._client.get("/v1/models")
+        response.raise_for_status()
+        return response.json()
     
     async def chat_completion(
         self,
@@ -66,42 +82,30 @@ class LLMOrchestratorClient:
     
     async def _chat_completion(self, data: dict):
         """非流式聊天完成"""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{self.base_url}/v1/chat/completions",
-                headers=self.headers,
-                json=data
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._client.post("/v1/chat/completions", json=data)
+        response.raise_for_status()
+        return response.json()
     
     async def _stream_chat_completion(self, data: dict) -> AsyncGenerator[str, None]:
         """流式聊天完成"""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            async with client.stream(
-                "POST",
-                f"{self.base_url}/v1/chat/completions",
-                headers=self.headers,
-                json=data
-            ) as response:
-                response.raise_for_status()
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        chunk = line[6:]
-                        if chunk.strip() == "[DONE]":
-                            break
-                        yield chunk
+        async with self._client.stream(
+            "POST",
+            "/v1/chat/completions",
+            json=data
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.startswith("data: "):
+                    chunk = line[6:]
+                    if chunk.strip() == "[DONE]":
+                        break
+                    yield chunk
 
 
-async def example_basic_chat():
+async def example_basic_chat(client: LLMOrchestratorClient):
     """示例1: 基本聊天"""
     print("=== 示例1: 基本聊天 ===\n")
     
-    client = LLMOrchestratorClient(
-        base_url="http://localhost:8000",
-        api_key="test-key"
-    )
-    
     response = await client.chat_completion(
         messages=[
             {"role": "system", "content": "You are a helpful assistant."},
@@ -118,15 +122,10 @@ async def example_basic_chat():
     print()
 
 
-async def example_streaming_chat():
+async def example_streaming_chat(client: LLMOrchestratorClient):
     """示例2: 流式聊天"""
     print("=== 示例2: 流式聊天 ===\n")
     
-    client = LLMOrchestratorClient(
-        base_url="http://localhost:8000",
-        api_key="test-key"
-    )
-    
     print("AI: ", end="", flush=True)
     
     stream = await client.chat_completion(
@@ -137,27 +136,27 @@ async def example_streaming_chat():
         stream=True
     )
     
-    import json
     async for chunk in stream:
+        # 跳过空行和非 JSON 帧, 不进入异常处理
+        if not chunk or chunk[0] != "{":
+            continue
         try:
-            data = json.loads(chunk)
-            if data['choices'][0]['delta'].get('content'):
-                print(data['choices'][0]['delta']['content'], end="", flush=True)
-        except json.JSONDecodeError:
+            data = orjson.loads(chunk)
+        except orjson.JSONDecodeError:
             continue
+        
+        content = data['choices'][0]['delta'].get('content')
+        if content:
+            sys.stdout.write(content)
+            sys.stdout.flush()
     
     print("\n")
 
 
-async def example_multi_turn_conversation():
+async def example_multi_turn_conversation(client: LLMOrchestratorClient):
     """示例3: 多轮对话"""
     print("=== 示例3: 多轮对话 ===\n")
     
-    client = LLMOrchestratorClient(
-        base_url="http://localhost:8000",
-        api_key="test-key"
-    )
-    
     messages = [
         {"role": "system", "content": "You are a helpful math tutor."}
     ]
@@ -178,15 +177,10 @@ async def example_multi_turn_conversation():
     print(f"AI: {assistant_reply}\n")
 
 
-async def example_list_models():
+async def example_list_models(client: LLMOrchestratorClient):
     """示例4: 列出可用模型"""
     print("=== 示例4: 列出可用模型 ===\n")
     
-    client = LLMOrchestratorClient(
-        base_url="http://localhost:8000",
-        api_key="test-key"
-    )
-    
     models = await client.list_models()
     
     print(f"总共 {len(models['data'])} 个模型:")
@@ -198,15 +192,10 @@ async def example_list_models():
     print()
 
 
-async def example_custom_parameters():
+async def example_custom_parameters(client: LLMOrchestratorClient):
     """示例5: 自定义参数"""
     print("=== 示例5: 自定义参数 ===\n")
     
-    client = LLMOrchestratorClient(
-        base_url="http://localhost:8000",
-        api_key="test-key"
-    )
-    
     response = await client.chat_completion(
         messages=[
             {"role": "user", "content": "Write a creative story beginning."}
@@ -231,25 +220,29 @@ async def main():
     print()
     
     try:
-        # 示例1: 基本聊天
-        await example_basic_chat()
-        
-        # 示例2: 流式聊天
-        await example_streaming_chat()
-        
-        # 示例3: 多轮对话
-        await example_multi_turn_conversation()
-        
-        # 示例4: 列出模型
-        await example_list_models()
-        
-        # 示例5: 自定义参数
-        await example_custom_parameters()
-        
-        print("=" * 60)
-        print("所有示例运行完成!")
-        print("=" * 60)
-        
+        async with LLMOrchestratorClient(
+            base_url="http://localhost:8000",
+            api_key="test-key"
+        ) as client:
+            # 示例1: 基本聊天
+            await example_basic_chat(client)
+            
+            # 示例2: 流式聊天
+            await example_streaming_chat(client)
+            
+            # 示例3: 多轮对话
+            await example_multi_turn_conversation(client)
+            
+            # 示例4: 列出模型
+            await example_list_models(client)
+            
+            # 示例5: 自定义参数
+            await example_custom_parameters(client)
+            
+            print("=" * 60)
+            print("所有示例运行完成!")
+            print("=" * 60)
+            
     except httpx.HTTPError as e:
         print(f"\n错误: 无法连接到 API")
         print(f"请确保服务正在运行: http://localhost:8000")
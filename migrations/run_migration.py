@@ -10,16 +10,21 @@ from pathlib import Path
 def run_migration(db_path: str = "llm_orchestrator.db"):
     """Run database migration with proper error handling"""
     
-    conn = sqlite3.connect(db_path)
+    # Manage the transaction explicitly: sqlite3 would otherwise commit each
+    # ALTER TABLE on its own (one journal sync per statement)
+    conn = sqlite3.connect(db_path, isolation_level=None)
     cursor = conn.cursor()
     
     print(f"Running migration on: {db_path}")
     
+    # Run all DDL and the data update in a single transaction
+    cursor.execute("BEGIN IMMEDIATE")
+    
     # List of columns to add
     migrations = [
         ("response_time_ms", "ALTER TABLE provider_health ADD COLUMN response_time_ms REAL DEFAULT 0.0"),
         ("error_message", "ALTER TABLE provider_health ADD COLUMN error_message TEXT"),
-        ("last_check", "ALTER TABLE provider_health ADD COLUMN last_check TIMESTAMP DEFAULT CURRENT_TIMESTAMP"),
+        ("last_check", "ALTER TABLE provider_health ADD COLUMN last_check TIMESTAMP"),
         ("consecutive_failures", "ALTER TABLE provider_health ADD COLUMN consecutive_failures INTEGER DEFAULT 0"),
         ("success_rate", "ALTER TABLE provider_health ADD COLUMN success_rate REAL DEFAULT 100.0"),
     ]
@@ -34,7 +39,7 @@ def run_migration(db_path: str = "llm_orchestrator.db"):
                 print(f"○ Column already exists: {column_name}")
             else:
                 print(f"✗ Error adding column {column_name}: {e}")
-                conn.rollback()
+                cursor.execute("ROLLBACK")
                 conn.close()
                 return False
     
@@ -60,7 +65,7 @@ def run_migration(db_path: str = "llm_orchestrator.db"):
         print(f"○ Index creation: {e}")
     
     # Commit changes
-    conn.commit()
+    cursor.execute("COMMIT")
     
     # Verify migration
     try:
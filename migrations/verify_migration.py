@@ -20,10 +20,6 @@ def verify_migration(db_path: str = "llm_orchestrator.db"):
     print(f"Checking database: {db_path}")
     print("=" * 60)
     
-    # Get table structure
-    cursor.execute("PRAGMA table_info(provider_health)")
-    columns = {row[1]: row[2] for row in cursor.fetchall()}
-    
     # Required columns
     required = {
         'id': 'INTEGER',
@@ -36,6 +32,15 @@ def verify_migration(db_path: str = "llm_orchestrator.db"):
         'success_rate': 'REAL',
     }
     
+    # Get structure of the required columns in one query
+    placeholders = ", ".join("?" for _ in required)
+    cursor.execute(
+        f"SELECT name, type FROM pragma_table_info('provider_health') "
+        f"WHERE name IN ({placeholders})",
+        list(required)
+    )
+    columns = dict(cursor.fetchall())
+    
     # Check each required column
     missing = []
     present = []
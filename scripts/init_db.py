@@ -10,7 +10,7 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from sqlalchemy import inspect, text
+from sqlalchemy import inspect
 from app.core.database import engine, AsyncSessionLocal
 from app.core.config import settings
 from app.core.logger import get_logger
@@ -18,15 +18,15 @@ from app.core.logger import get_logger
 logger = get_logger(__name__)
 
 
+def _table_names(connection):
+    """同步读取表名 (供 run_sync 调用)"""
+    return inspect(connection).get_table_names()
+
+
 async def check_tables_exist():
     """检查数据库表是否存在"""
-    async with engine.begin() as conn:
-        def _check(connection):
-            inspector = inspect(connection)
-            return inspector.get_table_names()
-        
-        tables = await conn.run_sync(_check)
-        return tables
+    async with engine.connect() as conn:
+        return await conn.run_sync(_table_names)
 
 
 async def verify_database():
@@ -34,14 +34,13 @@ async def verify_database():
     try:
         logger.info("检查数据库连接...")
         
-        # 测试连接
-        async with engine.begin() as conn:
-            await conn.execute(text("SELECT 1"))
+        # 测试连接并检查表 (复用同一个连接)
+        async with engine.connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
+            logger.info("✅ 数据库连接正常")
+            
+            tables = await conn.run_sync(_table_names)
         
-        logger.info("✅ 数据库连接正常")
-        
-        # 检查表
-        tables = await check_tables_exist()
         expected_tables = [
             'providers', 'models', 'model_providers',
             'request_logs', 'provider_health', 'provider_stats'
@@ -15,6 +15,18 @@ sys.path.insert(0, str(project_root))
 import httpx
 from typing import Optional
 
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时退回 httpx 自带的解析
+    orjson = None
+
+
+def _parse_json(response: httpx.Response):
+    """解析 JSON 响应体 (优先使用 orjson, 直接解析字节)"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
 
 class APITester:
     """API 测试类"""
@@ -23,6 +35,19 @@ class APITester:
         self.base_url = base_url
         self.api_key = api_key or "test-key"
         self.admin_key = admin_key or "admin-key"
+        
+        # 所有测试共用一个 HTTP 客户端, 复用连接 (避免每个测试都重新握手)
+        self._client = httpx.AsyncClient(timeout=30.0)
+    
+    async def aclose(self):
+        """关闭 HTTP 客户端"""
+        await self._client.aclose()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
     
     def _get_headers(self, use_admin: bool = False):
         """获取请求头"""
@@ -34,124 +59,139 @@ class APITester:
     
     async def test_health(self):
         """测试健康检查端点"""
-        print("\n=== 测试健康检查 ===")
+        out = []
+        out.append("\n=== 测试健康检查 ===")
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.base_url}/health")
-                print(f"状态码: {response.status_code}")
-                print(f"响应: {response.json()}")
-                return response.status_code == 200
+            client = self._client
+            response = await client.get(f"{self.base_url}/health")
+            out.append(f"状态码: {response.status_code}")
+            out.append(f"响应: {_parse_json(response)}")
+            return response.status_code == 200
         except Exception as e:
-            print(f"错误: {e}")
+            out.append(f"错误: {e}")
             return False
+        finally:
+            print("\n".join(out))
     
     async def test_models_list(self):
         """测试模型列表端点"""
-        print("\n=== 测试模型列表 ===")
+        out = []
+        out.append("\n=== 测试模型列表 ===")
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/v1/models",
-                    headers=self._get_headers()
-                )
-                print(f"状态码: {response.status_code}")
-                data = response.json()
-                print(f"模型数量: {len(data.get('data', []))}")
-                for model in data.get('data', [])[:5]:
-                    print(f"  - {model['id']}")
-                return response.status_code == 200
+            client = self._client
+            response = await client.get(
+                f"{self.base_url}/v1/models",
+                headers=self._get_headers()
+            )
+            out.append(f"状态码: {response.status_code}")
+            data = _parse_json(response)
+            out.append(f"模型数量: {len(data.get('data', []))}")
+            for model in data.get('data', [])[:5]:
+                out.append(f"  - {model['id']}")
+            return response.status_code == 200
         except Exception as e:
-            print(f"错误: {e}")
+            out.append(f"错误: {e}")
             return False
+        finally:
+            print("\n".join(out))
     
     async def test_chat_completion(self):
         """测试聊天完成端点"""
-        print("\n=== 测试聊天完成 ===")
+        out = []
+        out.append("\n=== 测试聊天完成 ===")
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                request_data = {
-                    "model": "gpt-3.5-turbo",
-                    "messages": [
-                        {"role": "user", "content": "Say 'Hello, World!' in one sentence."}
-                    ],
-                    "max_tokens": 50
-                }
-                
-                print(f"发送请求: {json.dumps(request_data, indent=2)}")
-                
-                response = await client.post(
-                    f"{self.base_url}/v1/chat/completions",
-                    headers=self._get_headers(),
-                    json=request_data
-                )
-                
-                print(f"状态码: {response.status_code}")
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    print(f"响应内容: {data['choices'][0]['message']['content']}")
-                    print(f"使用的提供商: {data.get('provider', 'unknown')}")
-                    print(f"Token 使用: {data.get('usage', {})}")
-                else:
-                    print(f"错误响应: {response.text}")
-                
-                return response.status_code == 200
+            client = self._client
+            request_data = {
+                "model": "gpt-3.5-turbo",
+                "messages": [
+                    {"role": "user", "content": "Say 'Hello, World!' in one sentence."}
+                ],
+                "max_tokens": 50
+            }
+            
+            out.append(f"发送请求: {json.dumps(request_data, indent=2)}")
+            
+            response = await client.post(
+                f"{self.base_url}/v1/chat/completions",
+                headers=self._get_headers(),
+                json=request_data
+            )
+            
+            out.append(f"状态码: {response.status_code}")
+            
+            if response.status_code == 200:
+                data = _parse_json(response)
+                out.append(f"响应内容: {data['choices'][0]['message']['content']}")
+                out.append(f"使用的提供商: {data.get('provider', 'unknown')}")
+                out.append(f"Token 使用: {data.get('usage', {})}")
+            else:
+                out.append(f"错误响应: {response.text}")
+            
+            return response.status_code == 200
         except Exception as e:
-            print(f"错误: {e}")
+            out.append(f"错误: {e}")
             return False
+        finally:
+            print("\n".join(out))
     
     async def test_providers_list(self):
         """测试提供商列表端点"""
-        print("\n=== 测试提供商列表 ===")
+        out = []
+        out.append("\n=== 测试提供商列表 ===")
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/admin/providers",
-                    headers=self._get_headers(use_admin=True)
-                )
-                print(f"状态码: {response.status_code}")
-                
-                if response.status_code == 200:
-                    providers = response.json()
-                    print(f"提供商数量: {len(providers)}")
-                    for provider in providers:
-                        status = "✓ 启用" if provider['enabled'] else "✗ 禁用"
-                        print(f"  - {provider['name']} ({provider['type']}) {status}")
-                else:
-                    print(f"错误响应: {response.text}")
-                
-                return response.status_code == 200
+            client = self._client
+            response = await client.get(
+                f"{self.base_url}/admin/providers",
+                headers=self._get_headers(use_admin=True)
+            )
+            out.append(f"状态码: {response.status_code}")
+            
+            if response.status_code == 200:
+                providers = _parse_json(response)
+                out.append(f"提供商数量: {len(providers)}")
+                for provider in providers:
+                    status = "✓ 启用" if provider['enabled'] else "✗ 禁用"
+                    out.append(f"  - {provider['name']} ({provider['type']}) {status}")
+            else:
+                out.append(f"错误响应: {response.text}")
+            
+            return response.status_code == 200
         except Exception as e:
-            print(f"错误: {e}")
+            out.append(f"错误: {e}")
             return False
+        finally:
+            print("\n".join(out))
     
     async def test_system_health(self):
         """测试系统健康状态端点"""
-        print("\n=== 测试系统健康状态 ===")
+        out = []
+        out.append("\n=== 测试系统健康状态 ===")
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/admin/health",
-                    headers=self._get_headers(use_admin=True)
-                )
-                print(f"状态码: {response.status_code}")
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    print(f"系统状态: {data['status']}")
-                    print(f"数据库状态: {data['database_status']}")
-                    print(f"缓存状态: {data['cache_status']}")
-                    print(f"提供商健康:")
-                    for provider in data['providers']:
-                        status = "✓ 健康" if provider['is_healthy'] else "✗ 不健康"
-                        print(f"  - {provider['provider_name']}: {status}")
-                else:
-                    print(f"错误响应: {response.text}")
-                
-                return response.status_code == 200
+            client = self._client
+            response = await client.get(
+                f"{self.base_url}/admin/health",
+                headers=self._get_headers(use_admin=True)
+            )
+            out.append(f"状态码: {response.status_code}")
+            
+            if response.status_code == 200:
+                data = _parse_json(response)
+                out.append(f"系统状态: {data['status']}")
+                out.append(f"数据库状态: {data['database_status']}")
+                out.append(f"缓存状态: {data['cache_status']}")
+                out.append(f"提供商健康:")
+                for provider in data['providers']:
+                    status = "✓ 健康" if provider['is_healthy'] else "✗ 不健康"
+                    out.append(f"  - {provider['provider_name']}: {status}")
+            else:
+                out.append(f"错误响应: {response.text}")
+            
+            return response.status_code == 200
         except Exception as e:
-            print(f"错误: {e}")
+            out.append(f"错误: {e}")
             return False
+        finally:
+            print("\n".join(out))
     
     async def run_all_tests(self):
         """运行所有测试"""
@@ -160,16 +200,30 @@ class APITester:
         print("=" * 50)
         print(f"基础URL: {self.base_url}")
         
-        tests = [
+        # 互不依赖的只读测试并发执行 (各测试的输出在结束时整块打印, 不会交错)
+        concurrent_tests = [
             ("健康检查", self.test_health),
             ("模型列表", self.test_models_list),
-            ("聊天完成", self.test_chat_completion),
             ("提供商列表", self.test_providers_list),
             ("系统健康", self.test_system_health),
         ]
+        # 聊天完成会真正调用上游提供商, 单独顺序执行
+        sequential_tests = [
+            ("聊天完成", self.test_chat_completion),
+        ]
         
         results = {}
-        for name, test_func in tests:
+        outcomes = await asyncio.gather(
+            *(test_func() for _, test_func in concurrent_tests),
+            return_exceptions=True
+        )
+        for (name, _), outcome in zip(concurrent_tests, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"\n测试 {name} 时发生异常: {outcome}")
+                outcome = False
+            results[name] = outcome
+        
+        for name, test_func in sequential_tests:
             try:
                 results[name] = await test_func()
             except Exception as e:
@@ -222,23 +276,22 @@ async def main():
     
     args = parser.parse_args()
     
-    tester = APITester(
+    async with APITester(
         base_url=args.url,
         api_key=args.api_key,
         admin_key=args.admin_key
-    )
-    
-    if args.test == "all":
-        success = await tester.run_all_tests()
-    else:
-        test_map = {
-            "health": tester.test_health,
-            "models": tester.test_models_list,
-            "chat": tester.test_chat_completion,
-            "providers": tester.test_providers_list,
-            "system": tester.test_system_health,
-        }
-        success = await test_map[args.test]()
+    ) as tester:
+        if args.test == "all":
+            success = await tester.run_all_tests()
+        else:
+            test_map = {
+                "health": tester.test_health,
+                "models": tester.test_models_list,
+                "chat": tester.test_chat_completion,
+                "providers": tester.test_providers_list,
+                "system": tester.test_system_health,
+            }
+            success = await test_map[args.test]()
     
     sys.exit(0 if success else 1)
 
@@ -2,15 +2,29 @@
 Pytest 配置和共享 fixtures
 """
 import asyncio
+import fnmatch
+import random
 import pytest
 import pytest_asyncio
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.pool import NullPool
-from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.pool import StaticPool
+from httpx import AsyncClient, ASGITransport
 
+from app.core.cache import RedisCache
 from app.core.database import Base, get_db
-from app.core.config import get_settings
 from app.main import app
+from app.services.balancer import LoadBalancer
+
+
+# 模拟流式响应的 SSE 分块 (bytes, 与 httpx/ASGI 实际交付的一致)
+MOCK_STREAM_CHUNKS = (
+    b'data: {"id":"chatcmpl-123","object":"chat.completion.chunk","created":1677652288,"model":"gpt-3.5-turbo","choices":[{"index":0,"delta":{"role":"assistant"},"finish_reason":null}]}\n\n',
+    b'data: {"id":"chatcmpl-123","object":"chat.completion.chunk","created":1677652288,"model":"gpt-3.5-turbo","choices":[{"index":0,"delta":{"content":"Hello"},"finish_reason":null}]}\n\n',
+    b'data: {"id":"chatcmpl-123","object":"chat.completion.chunk","created":1677652288,"model":"gpt-3.5-turbo","choices":[{"index":0,"delta":{"content":"!"},"finish_reason":null}]}\n\n',
+    b'data: {"id":"chatcmpl-123","object":"chat.completion.chunk","created":1677652288,"model":"gpt-3.5-turbo","choices":[{"index":0,"delta":{},"finish_reason":"stop"}]}\n\n',
+    b'data: [DONE]\n\n',
+)
 
 
 @pytest.fixture(scope="session")
@@ -21,17 +35,37 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def _seed_random():
+    """每个测试前固定随机种子 (模块 random 与负载均衡器共享的 RNG), 避免加权选择的断言偶发失败"""
+    random.seed(42)
+    LoadBalancer._rng.seed(42)
+    yield
+
+
 @pytest_asyncio.fixture(scope="session")
 async def test_engine():
     """创建测试数据库引擎"""
-    settings = get_settings()
     # 使用 SQLite 内存数据库进行测试
+    # 每个 :memory: 连接都是独立的空库, 用 StaticPool 共享同一个连接,
+    # 这样 create_all 建的表对所有会话可见
     engine = create_async_engine(
         "sqlite+aiosqlite:///:memory:",
-        poolclass=NullPool,
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
         echo=False
     )
     
+    # pysqlite/aiosqlite 自行处理 BEGIN 和 SAVEPOINT, 外层回滚会漏掉 SAVEPOINT 中的数据;
+    # 按 SQLAlchemy 文档关闭驱动的事务处理, 由 SQLAlchemy 显式发出 BEGIN
+    @event.listens_for(engine.sync_engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+    
+    @event.listens_for(engine.sync_engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+    
     # 创建表
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -44,29 +78,43 @@ async def test_engine():
 
 @pytest_asyncio.fixture
 async def test_session(test_engine):
-    """创建测试数据库会话"""
-    async_session = async_sessionmaker(
-        test_engine,
-        class_=AsyncSession,
-        expire_on_commit=False
-    )
+    """
+    创建测试数据库会话
     
-    async with async_session() as session:
-        yield session
-        await session.rollback()
+    会话绑定在一个外层事务上, 测试中的 commit 只释放 SAVEPOINT,
+    测试结束后回滚外层事务 (依赖 test_engine 中的 BEGIN 处理)
+    """
+    async with test_engine.connect() as conn:
+        trans = await conn.begin()
+        session = AsyncSession(
+            bind=conn,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint"
+        )
+        try:
+            yield session
+        finally:
+            await session.close()
+            await trans.rollback()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def _asgi_client():
+    """创建整个测试会话共用的 ASGI 客户端"""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
 
 
 @pytest_asyncio.fixture
-async def test_client(test_session):
-    """创建测试客户端"""
+async def test_client(_asgi_client, test_session):
+    """创建测试客户端 (每个测试只切换数据库依赖)"""
     # 覆盖数据库依赖
     async def override_get_db():
         yield test_session
     
     app.dependency_overrides[get_db] = override_get_db
     
-    async with AsyncClient(app=app, base_url="http://test") as client:
-        yield client
+    yield _asgi_client
     
     # 清理
     app.dependency_overrides.clear()
@@ -100,11 +148,89 @@ def mock_openai_response():
 
 @pytest.fixture
 def mock_streaming_response():
-    """模拟流式响应"""
-    return [
-        'data: {"id":"chatcmpl-123","object":"chat.completion.chunk","created":1677652288,"model":"gpt-3.5-turbo","choices":[{"index":0,"delta":{"role":"assistant"},"finish_reason":null}]}\n\n',
-        'data: {"id":"chatcmpl-123","object":"chat.completion.chunk","created":1677652288,"model":"gpt-3.5-turbo","choices":[{"index":0,"delta":{"content":"Hello"},"finish_reason":null}]}\n\n',
-        'data: {"id":"chatcmpl-123","object":"chat.completion.chunk","created":1677652288,"model":"gpt-3.5-turbo","choices":[{"index":0,"delta":{"content":"!"},"finish_reason":null}]}\n\n',
-        'data: {"id":"chatcmpl-123","object":"chat.completion.chunk","created":1677652288,"model":"gpt-3.5-turbo","choices":[{"index":0,"delta":{},"finish_reason":"stop"}]}\n\n',
-        'data: [DONE]\n\n'
-    ]
\ No newline at end of file
+    """模拟流式响应 (返回生成器工厂, 每次调用得到一个新的分块生成器)"""
+    def _make():
+        yield from MOCK_STREAM_CHUNKS
+    return _make
+
+
+class _MemoryPubSub:
+    """MemoryCache 的订阅句柄 (接口与 redis PubSub 的 listen/unsubscribe/close 一致)"""
+    
+    def __init__(self, cache: "MemoryCache", channel: str):
+        self.cache = cache
+        self.channel = channel
+        self.queue: asyncio.Queue = asyncio.Queue()
+        cache.subscribers.setdefault(channel, []).append(self.queue)
+    
+    async def listen(self):
+        while True:
+            yield await self.queue.get()
+    
+    async def unsubscribe(self, channel: str) -> None:
+        queues = self.cache.subscribers.get(channel, [])
+        if self.queue in queues:
+            queues.remove(self.queue)
+    
+    async def close(self) -> None:
+        pass
+
+
+class MemoryCache(RedisCache):
+    """
+    进程内的 RedisCache 替身 (测试环境没有 Redis)
+    
+    只实现路由器/负载均衡器用到的操作, 同一实例上的 publish 会投递给所有订阅者,
+    用来模拟多个 worker 共享同一个 Redis
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.store = {}
+        self.subscribers = {}
+    
+    async def get(self, key):
+        return self.store.get(key)
+    
+    async def set(self, key, value, ttl=None):
+        self.store[key] = value
+        return True
+    
+    async def get_bytes(self, key):
+        return self.store.get(key)
+    
+    async def set_bytes(self, key, value, ttl=None):
+        self.store[key] = value
+        return True
+    
+    async def delete(self, key):
+        return self.store.pop(key, None) is not None
+    
+    async def clear(self, pattern="*"):
+        for key in fnmatch.filter(list(self.store), pattern):
+            del self.store[key]
+        return True
+    
+    async def exists(self, key):
+        return key in self.store
+    
+    async def exists_many(self, *keys):
+        return [key in self.store for key in keys]
+    
+    async def increment(self, key, amount=1, ttl=None):
+        self.store[key] = self.store.get(key, 0) + amount
+        return self.store[key]
+    
+    async def publish(self, channel, message):
+        for queue in self.subscribers.get(channel, []):
+            queue.put_nowait({"type": "message", "channel": channel, "data": message})
+        return True
+    
+    async def subscribe(self, channel):
+        return _MemoryPubSub(self, channel)
+
+
+@pytest.fixture
+def memory_cache():
+    """进程内缓存替身"""
+    return MemoryCache()
@@ -4,8 +4,10 @@ API 路由测试
 import pytest
 from httpx import AsyncClient
 
+# 本模块所有测试均为异步测试
+pytestmark = pytest.mark.asyncio
+
 
-@pytest.mark.asyncio
 class TestHealthEndpoint:
     """健康检查端点测试"""
     
@@ -18,15 +20,9 @@ class TestHealthEndpoint:
         assert "timestamp" in data
 
 
-@pytest.mark.asyncio
 class TestModelsEndpoint:
     """模型列表端点测试"""
     
-    async def test_list_models_without_auth(self, test_client: AsyncClient):
-        """测试未认证的模型列表请求"""
-        response = await test_client.get("/v1/models")
-        assert response.status_code == 401
-    
     async def test_list_models_with_auth(self, test_client: AsyncClient):
         """测试已认证的模型列表请求"""
         response = await test_client.get(
@@ -47,7 +43,6 @@ class TestModelsEndpoint:
         assert response.status_code == 401
 
 
-@pytest.mark.asyncio
 class TestChatCompletionEndpoint:
     """聊天完成端点测试"""
     
@@ -84,21 +79,16 @@ class TestChatCompletionEndpoint:
         assert response.status_code == 422
 
 
-@pytest.mark.asyncio
-class TestAdminEndpoints:
-    """管理员端点测试"""
+class TestAuthRequired:
+    """需要认证的端点测试"""
     
-    async def test_admin_health_without_auth(self, test_client: AsyncClient):
-        """测试未认证的管理员健康检查"""
-        response = await test_client.get("/admin/health")
+    @pytest.mark.parametrize("path", [
+        "/v1/models",
+        "/admin/health",
+        "/admin/providers",
+        "/admin/stats",
+    ])
+    async def test_requires_auth(self, test_client: AsyncClient, path: str):
+        """测试未认证的请求被拒绝"""
+        response = await test_client.get(path)
         assert response.status_code == 401
-    
-    async def test_admin_providers_without_auth(self, test_client: AsyncClient):
-        """测试未认证的提供商列表"""
-        response = await test_client.get("/admin/providers")
-        assert response.status_code == 401
-    
-    async def test_admin_stats_without_auth(self, test_client: AsyncClient):
-        """测试未认证的统计信息"""
-        response = await test_client.get("/admin/stats")
-        assert response.status_code == 401
\ No newline at end of file
@@ -9,8 +9,10 @@ from app.models.provider import Provider, ModelConfig, ModelProvider
 from app.models.request_log import RequestLog
 from app.models.health import ProviderHealth
 
+# 本模块所有测试均为异步测试
+pytestmark = pytest.mark.asyncio
+
 
-@pytest.mark.asyncio
 class TestProviderModel:
     """Provider 模型测试"""
     
@@ -27,7 +29,6 @@ class TestProviderModel:
         
         test_session.add(provider)
         await test_session.commit()
-        await test_session.refresh(provider)
         
         assert provider.id is not None
         assert provider.name == "test-provider"
@@ -57,7 +58,6 @@ class TestProviderModel:
             await test_session.commit()
 
 
-@pytest.mark.asyncio
 class TestModelConfigModel:
     """ModelConfig 模型测试"""
     
@@ -76,7 +76,6 @@ class TestModelConfigModel:
         
         test_session.add(model)
         await test_session.commit()
-        await test_session.refresh(model)
         
         assert model.id is not None
         assert model.name == "gpt-3.5-turbo"
@@ -84,7 +83,6 @@ class TestModelConfigModel:
         assert model.supports_streaming is True
 
 
-@pytest.mark.asyncio
 class TestModelProviderRelation:
     """ModelProvider 关系测试"""
     
@@ -98,7 +96,7 @@ class TestModelProviderRelation:
             priority=100
         )
         test_session.add(provider)
-        await test_session.commit()
+        await test_session.flush()
         
         # 创建模型
         model = ModelConfig(
@@ -107,7 +105,7 @@ class TestModelProviderRelation:
             context_length=4096
         )
         test_session.add(model)
-        await test_session.commit()
+        await test_session.flush()
         
         # 创建映射
         mapping = ModelProvider(
@@ -117,14 +115,13 @@ class TestModelProviderRelation:
             enabled=True
         )
         test_session.add(mapping)
-        await test_session.commit()
+        await test_session.flush()
         
         assert mapping.id is not None
         assert mapping.model_id == model.id
         assert mapping.provider_id == provider.id
 
 
-@pytest.mark.asyncio
 class TestRequestLogModel:
     """RequestLog 模型测试"""
     
@@ -143,7 +140,6 @@ class TestRequestLogModel:
         
         test_session.add(log)
         await test_session.commit()
-        await test_session.refresh(log)
         
         assert log.id is not None
         assert log.request_id == "test-123"
@@ -152,7 +148,6 @@ class TestRequestLogModel:
         assert log.created_at is not None
 
 
-@pytest.mark.asyncio
 class TestProviderHealthModel:
     """ProviderHealth 模型测试"""
     
@@ -169,7 +164,6 @@ class TestProviderHealthModel:
         
         test_session.add(health)
         await test_session.commit()
-        await test_session.refresh(health)
         
         assert health.id is not None
         assert health.is_healthy is True
@@ -1,215 +1,314 @@
 """
 服务层测试
 """
+import asyncio
+import contextlib
+import random
+import types
+from collections import Counter
+
 import pytest
-from unittest.mock import Mock, AsyncMock, patch
+from unittest.mock import AsyncMock
 
-from app.services.balancer import LoadBalancer
+from app.api.dependencies import get_cache
+from app.api.schemas import ChatCompletionRequest, ChatMessage, MessageRole
+from app.core.cache import RedisCache, cache as shared_cache
+from app.core.config import settings
+from app.providers.exceptions import CircuitOpenError
+from app.providers.factory import ProviderFactory
+from app.services import health_check
+from app.services.alias_table import AliasTable
+from app.services.balancer import (
+    INVALIDATE_CHANNEL,
+    LoadBalancer,
+    SelectionState,
+    listen_for_invalidations
+)
+from app.services.health_check import HealthCheckService
+from app.services.router import AllProvidersFailedError, ProviderSnapshot, RequestRouter
 from app.models.provider import Provider
 
 
-@pytest.mark.asyncio
+@pytest.fixture(scope="class", params=[3, 100, 1000])
+def weighted_balancer(request):
+    """
+    预热选择缓存的负载均衡器 (按提供商数量参数化)
+    
+    别名表在 fixture 中只构建一次, 测试中的选择全部命中进程内缓存
+    """
+    n = request.param
+    rows = [
+        {"id": i, "name": f"provider-{i}", "weight": n - i + 1, "priority": 100, "is_healthy": True}
+        for i in range(1, n + 1)
+    ]
+    balancer = LoadBalancer(db=None, cache=None, seed=0)
+    LoadBalancer._local_cache["balancer:providers:default"] = SelectionState(
+        fingerprint=None,
+        providers=rows,
+        table=balancer._build_alias_table(rows),
+        sorted_names=[row["name"] for row in rows],
+        healthy_by_name={row["name"]: True for row in rows},
+        expires_at=float("inf")
+    )
+    
+    yield balancer, rows
+    
+    LoadBalancer.invalidate_local_cache()
+
+
 class TestLoadBalancer:
     """负载均衡器测试"""
     
-    async def test_select_provider_with_no_providers(self):
+    def test_select_provider_with_no_providers(self):
         """测试没有可用提供商的情况"""
-        balancer = LoadBalancer()
+        balancer = LoadBalancer(db=None, cache=None)
         
-        result = await balancer.select_provider([])
-        assert result is None
+        with pytest.raises(Exception, match="No providers available"):
+            balancer._weighted_random_selection([])
     
-    async def test_select_provider_with_single_provider(self):
+    def test_select_provider_with_single_provider(self):
         """测试单个提供商的情况"""
-        balancer = LoadBalancer()
-        
-        provider = Provider(
-            id=1,
-            name="test-provider",
-            type="openai",
-            api_key="sk-test",
-            priority=100,
-            enabled=True
-        )
+        balancer = LoadBalancer(db=None, cache=None)
         
-        result = await balancer.select_provider([provider])
-        assert result == provider
-    
-    async def test_select_provider_with_multiple_providers(self):
-        """测试多个提供商的情况"""
-        balancer = LoadBalancer()
+        provider = {"id": 1, "name": "test-provider", "weight": 100, "priority": 100, "is_healthy": True}
         
-        providers = [
-            Provider(
-                id=1,
-                name="provider-1",
-                type="openai",
-                api_key="sk-test1",
-                priority=100,
-                enabled=True
-            ),
-            Provider(
-                id=2,
-                name="provider-2",
-                type="openai",
-                api_key="sk-test2",
-                priority=90,
-                enabled=True
-            ),
-            Provider(
-                id=3,
-                name="provider-3",
-                type="openai",
-                api_key="sk-test3",
-                priority=80,
-                enabled=True
-            )
-        ]
+        assert balancer._weighted_random_selection([provider]) == "test-provider"
+    
+    @pytest.mark.asyncio
+    async def test_select_provider_with_multiple_providers(self, weighted_balancer):
+        """测试多个提供商的情况 (选择状态已预热, 循环只测 O(1) 抽样)"""
+        balancer, rows = weighted_balancer
+        names = {row["name"] for row in rows}
+        third = len(rows) // 3
+        heavy = {row["name"] for row in rows[:third]}
+        light = {row["name"] for row in rows[-third:]}
         
         # 运行多次选择,验证加权随机
-        selections = []
-        for _ in range(100):
-            result = await balancer.select_provider(providers)
-            selections.append(result.id)
+        selections = [await balancer.select_provider() for _ in range(1000)]
         
-        # 验证所有提供商都被选择过
-        assert len(set(selections)) == 3
+        # 验证只会选到已知的提供商
+        assert set(selections) <= names
+        if len(rows) == 3:
+            assert set(selections) == names
         
-        # 验证高优先级提供商被选择的次数更多
-        provider1_count = selections.count(1)
-        provider3_count = selections.count(3)
-        assert provider1_count > provider3_count
+        # 验证权重最高的三分之一比最低的三分之一被选择的次数更多
+        heavy_count = sum(1 for name in selections if name in heavy)
+        light_count = sum(1 for name in selections if name in light)
+        assert heavy_count > light_count
     
-    async def test_select_provider_excludes_disabled(self):
+    @pytest.mark.asyncio
+    async def test_select_provider_excludes_disabled(self, test_session):
         """测试排除禁用的提供商"""
-        balancer = LoadBalancer()
+        test_session.add_all([
+            Provider(name="enabled-provider", type="openai", api_key="sk-test1", priority=100, enabled=True),
+            Provider(name="disabled-provider", type="openai", api_key="sk-test2", priority=90, enabled=False)
+        ])
+        await test_session.flush()
         
-        providers = [
-            Provider(
-                id=1,
-                name="enabled-provider",
-                type="openai",
-                api_key="sk-test1",
-                priority=100,
-                enabled=True
-            ),
-            Provider(
-                id=2,
-                name="disabled-provider",
-                type="openai",
-                api_key="sk-test2",
-                priority=90,
-                enabled=False
-            )
-        ]
-        
-        # 运行多次选择
-        for _ in range(10):
-            result = await balancer.select_provider(providers)
-            # 应该只选择启用的提供商
-            assert result.id == 1
-            assert result.enabled is True
+        # 未连接的缓存: 直接查库, 第一次选择后命中进程内缓存
+        balancer = LoadBalancer(test_session, RedisCache())
+        LoadBalancer.invalidate_local_cache()
+        try:
+            # 运行多次选择
+            for _ in range(10):
+                result = await balancer.select_provider()
+                # 应该只选择启用的提供商
+                assert result == "enabled-provider"
+        finally:
+            LoadBalancer.invalidate_local_cache()
 
 
 @pytest.mark.asyncio
 class TestRequestRouter:
     """请求路由器测试"""
     
-    @patch('app.services.router.RequestRouter.get_available_providers')
-    @patch('app.services.router.LoadBalancer.select_provider')
-    async def test_route_request_success(self, mock_select, mock_get_providers):
-        """测试成功的请求路由"""
-        from app.services.router import RequestRouter
-        
-        # 模拟提供商
-        mock_provider = Provider(
-            id=1,
-            name="test-provider",
-            type="openai",
-            api_key="sk-test",
-            priority=100,
-            enabled=True
+    @staticmethod
+    def _request():
+        return ChatCompletionRequest(
+            model="gpt-3.5-turbo",
+            messages=[ChatMessage(role=MessageRole.USER, content="Hi")]
         )
+    
+    async def test_route_request_success(self, memory_cache, monkeypatch):
+        """测试成功的请求路由"""
+        snapshot = ProviderSnapshot(id=1, type="openai", api_key="sk-1", base_url=None, timeout=60)
+        response = types.SimpleNamespace(provider=None)
+        instance = types.SimpleNamespace(chat_completion=AsyncMock(return_value=response))
+        get_instance = AsyncMock(return_value=instance)
+        monkeypatch.setattr(ProviderFactory, 'get_provider', get_instance)
         
-        mock_get_providers.return_value = [mock_provider]
-        mock_select.return_value = mock_provider
+        router = RequestRouter(db=None, cache=memory_cache)
+        monkeypatch.setattr(router, '_get_provider', AsyncMock(return_value=snapshot))
+        monkeypatch.setattr(router, '_log_request', AsyncMock())
         
-        router = RequestRouter(db_session=Mock())
-        result = await router.select_provider_for_model("gpt-3.5-turbo")
+        result = await router.route_request("test-provider", self._request(), "req-1")
         
-        assert result == mock_provider
+        assert result is response
+        assert result.provider == "test-provider"
+        assert get_instance.await_args.kwargs["provider_id"] == 1
+        router._log_request.assert_awaited_once()
     
-    @patch('app.services.router.RequestRouter.get_available_providers')
-    async def test_route_request_no_providers(self, mock_get_providers):
+    async def test_route_request_no_providers(self, memory_cache, monkeypatch):
         """测试没有可用提供商的情况"""
-        from app.services.router import RequestRouter
+        get_instance = AsyncMock()
+        monkeypatch.setattr(ProviderFactory, 'get_provider', get_instance)
         
-        mock_get_providers.return_value = []
+        router = RequestRouter(db=None, cache=memory_cache)
+        monkeypatch.setattr(router, '_get_provider', AsyncMock(return_value=None))
         
-        router = RequestRouter(db_session=Mock())
-        result = await router.select_provider_for_model("gpt-3.5-turbo")
+        with pytest.raises(AllProvidersFailedError) as exc_info:
+            await router.route_request(
+                "missing-provider", self._request(), "req-2",
+                fallback_providers=["missing-fallback"]
+            )
         
-        assert result is None
+        assert [name for name, _ in exc_info.value.errors] == ["missing-provider", "missing-fallback"]
+        get_instance.assert_not_awaited()
 
 
 @pytest.mark.asyncio
 class TestHealthCheckService:
     """健康检查服务测试"""
     
-    @patch('app.services.health_check.HealthCheckService.check_provider_health')
-    async def test_check_all_providers(self, mock_check):
-        """测试检查所有提供商"""
-        from app.services.health_check import HealthCheckService
+    async def test_check_all_providers(self, test_session, monkeypatch):
+        """测试检查所有提供商 (探测必须并发执行)"""
+        providers = [
+            Provider(name="provider-1", type="openai", api_key="sk-1", priority=100, enabled=True),
+            Provider(name="provider-2", type="anthropic", api_key="sk-2", priority=90, enabled=True)
+        ]
+        test_session.add_all(providers)
+        await test_session.flush()
         
-        mock_check.return_value = True
+        @contextlib.asynccontextmanager
+        async def _session():
+            yield test_session
         
-        service = HealthCheckService(db_session=Mock())
+        monkeypatch.setattr(health_check, 'AsyncSessionLocal', _session)
         
-        # 模拟提供商列表
-        providers = [
-            Provider(id=1, name="provider-1", type="openai", api_key="sk-1", priority=100),
-            Provider(id=2, name="provider-2", type="anthropic", api_key="sk-2", priority=90)
-        ]
+        # 只统计本测试插入的提供商, 库中其他到期的行不影响断言
+        ids = {p.id for p in providers}
+        
+        # 记录同时进行中的探测数量
+        running = 0
+        max_concurrent = 0
         
-        with patch.object(service, 'get_all_providers', return_value=providers):
-            results = await service.check_all_providers()
+        async def _tracker(provider, health):
+            nonlocal running, max_concurrent
+            if provider.id not in ids:
+                return {"id": None, "provider_id": provider.id, "is_healthy": True}
+            running += 1
+            max_concurrent = max(max_concurrent, running)
+            await asyncio.sleep(0.05)
+            running -= 1
+            return {"id": None, "provider_id": provider.id, "is_healthy": True}
         
-        assert len(results) == 2
-        assert all(r['is_healthy'] for r in results)
+        service = HealthCheckService()
+        monkeypatch.setattr(service, '_probe_provider', AsyncMock(side_effect=_tracker))
+        save = AsyncMock()
+        monkeypatch.setattr(service, '_save_health_values', save)
+        
+        await service.check_all_providers()
+        
+        # 逐个 await 时 max_concurrent 为 1, 耗时 N·L
+        assert max_concurrent == len(providers)
+        
+        values = [v for v in save.await_args.args[1] if v['provider_id'] in ids]
+        assert len(values) == 2
+        assert all(v['is_healthy'] for v in values)
+
+
+@pytest.mark.unit
+async def test_circuit_breaker_skips_failing_provider(memory_cache, monkeypatch):
+    """测试连续失败达到阈值后熔断, 之后普通请求和流式请求都直接跳过该提供商"""
+    # 路由依赖注入的必须是 lifespan 中连接的共享缓存
+    assert await get_cache() is shared_cache
+    
+    router = RequestRouter(db=None, cache=memory_cache)
+    get_provider = AsyncMock()
+    monkeypatch.setattr(router, '_get_provider', get_provider)
+    
+    for _ in range(settings.circuit_breaker_threshold - 1):
+        assert await router._record_failure("flaky-provider") is False
+    assert await router._record_failure("flaky-provider") is True
+    
+    request = ChatCompletionRequest(
+        model="gpt-3.5-turbo",
+        messages=[ChatMessage(role=MessageRole.USER, content="Hi")]
+    )
+    with pytest.raises(CircuitOpenError):
+        await router._try_provider(
+            provider_name="flaky-provider",
+            request=request,
+            request_id="req-1",
+            start_time=0.0,
+            api_key=None,
+            client_ip=None
+        )
+    with pytest.raises(CircuitOpenError):
+        await router.route_streaming_request("flaky-provider", request, "req-2").__anext__()
+    
+    # 熔断期间不查询提供商
+    get_provider.assert_not_awaited()
+
+
+@pytest.mark.unit
+async def test_invalidation_publish_clears_other_workers(memory_cache):
+    """测试另一个 worker 发布失效通知后, 本进程的选择缓存和提供商快照被清空"""
+    listener = asyncio.create_task(listen_for_invalidations(memory_cache))
+    try:
+        while not memory_cache.subscribers.get(INVALIDATE_CHANNEL):
+            await asyncio.sleep(0)
+        
+        LoadBalancer._local_cache["balancer:providers:default"] = SelectionState(
+            None, [], None, [], {}, float("inf")
+        )
+        LoadBalancer._singletons["balancer:providers:default"] = ("provider-1", float("inf"))
+        RequestRouter._provider_cache["provider-1"] = (None, float("inf"))
+        memory_cache.store["balancer:providers:default"] = b"stale"
+        
+        # 模拟另一个 worker 的管理接口: 清 Redis 并发布通知 (不经过本进程的本地缓存)
+        await memory_cache.clear("balancer:providers:*")
+        await memory_cache.publish(INVALIDATE_CHANNEL, "1")
+        for _ in range(10):
+            if not LoadBalancer._local_cache:
+                break
+            await asyncio.sleep(0)
+        
+        assert not LoadBalancer._local_cache
+        assert not LoadBalancer._singletons
+        assert not RequestRouter._provider_cache
+        assert "balancer:providers:default" not in memory_cache.store
+    finally:
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+        LoadBalancer.invalidate_local_cache()
+        RequestRouter.invalidate_provider_cache()
 
 
 @pytest.mark.unit
 def test_weighted_random_selection():
     """测试加权随机选择逻辑"""
-    from app.services.balancer import LoadBalancer
-    
-    balancer = LoadBalancer()
+    balancer = LoadBalancer(db=None, cache=None, seed=0)
     
     # 创建测试数据
     items = [
-        {'id': 1, 'weight': 100},
-        {'id': 2, 'weight': 50},
-        {'id': 3, 'weight': 25}
+        {'id': 1, 'name': 'provider-1', 'weight': 100},
+        {'id': 2, 'name': 'provider-2', 'weight': 50},
+        {'id': 3, 'name': 'provider-3', 'weight': 25}
     ]
+    ids_by_name = {item['name']: item['id'] for item in items}
     
-    # 运行多次选择
-    selections = []
-    for _ in range(1000):
-        # 模拟选择逻辑
-        import random
-        total_weight = sum(item['weight'] for item in items)
-        rand = random.uniform(0, total_weight)
-        cumulative = 0
-        for item in items:
-            cumulative += item['weight']
-            if rand <= cumulative:
-                selections.append(item['id'])
-                break
+    # 与 select_provider 相同: 别名表只构建一次, 每次抽样 O(1)
+    table = balancer._build_alias_table(items)
+    counts = Counter(
+        ids_by_name[balancer._weighted_random_selection(items, table)]
+        for _ in range(1000)
+    )
     
-    # 验证权重分布
-    count_1 = selections.count(1)
-    count_2 = selections.count(2)
-    count_3 = selections.count(3)
+    # 验证权重分布 (一次遍历计数)
+    count_1 = counts[1]
+    count_2 = counts[2]
+    count_3 = counts[3]
     
     # 权重比例应该接近 100:50:25 = 4:2:1
     assert count_1 > count_2 > count_3
@@ -219,4 +318,151 @@ def test_weighted_random_selection():
     ratio_2_3 = count_2 / count_3
     
     assert 1.5 < ratio_1_2 < 2.5  # 接近 2
-    assert 1.5 < ratio_2_3 < 2.5  # 接近 2
\ No newline at end of file
+    assert 1.5 < ratio_2_3 < 2.5  # 接近 2
+
+@pytest.mark.unit
+async def test_batch_selection_distribution():
+    """测试批量选择的分布 (一次调用抽样 10000 次)"""
+    balancer = LoadBalancer(db=None, cache=None, seed=0)
+    rows = [
+        {"id": i, "name": f"provider-{i}", "weight": weight, "priority": 100, "is_healthy": True}
+        for i, weight in enumerate([100, 50, 25], start=1)
+    ]
+    LoadBalancer._local_cache["balancer:providers:default"] = SelectionState(
+        fingerprint=None,
+        providers=rows,
+        table=balancer._build_alias_table(rows),
+        sorted_names=[row["name"] for row in rows],
+        healthy_by_name={row["name"]: True for row in rows},
+        expires_at=float("inf")
+    )
+    try:
+        counts = Counter(await balancer.select_providers_batch(10_000))
+    finally:
+        LoadBalancer.invalidate_local_cache()
+    
+    # 权重比例应该接近 100:50:25 = 4:2:1
+    assert sum(counts.values()) == 10_000
+    assert 1.7 < counts["provider-1"] / counts["provider-2"] < 2.3
+    assert 1.7 < counts["provider-2"] / counts["provider-3"] < 2.3
+
+
+@pytest.mark.unit
+async def test_smooth_wrr_interleaving():
+    """测试平滑加权轮询的交错顺序"""
+    balancer = LoadBalancer(db=None, cache=None, strategy="smooth_wrr")
+    rows = [
+        {"id": i, "name": name, "weight": weight, "priority": 100, "is_healthy": True}
+        for i, (name, weight) in enumerate([("A", 4), ("B", 3), ("C", 2)], start=1)
+    ]
+    LoadBalancer._local_cache["balancer:providers:default"] = SelectionState(
+        fingerprint="abc",
+        providers=rows,
+        table=balancer._build_alias_table(rows),
+        sorted_names=["A", "B", "C"],
+        healthy_by_name={"A": True, "B": True, "C": True},
+        expires_at=float("inf")
+    )
+    try:
+        selections = [await balancer.select_provider() for _ in range(18)]
+    finally:
+        LoadBalancer.invalidate_local_cache()
+    
+    # 4:3:2 的平滑交错序列, 每 9 次重复一轮
+    assert selections == list("ABCABACBA") * 2
+
+
+@pytest.mark.unit
+def test_alias_table_distribution():
+    """测试别名表抽样分布"""
+    table = AliasTable.build([100, 50, 25])
+    rng = random.Random(42)
+    
+    counts = [0, 0, 0]
+    for _ in range(7000):
+        counts[table.draw(rng)] += 1
+    
+    # 权重比例应该接近 100:50:25 = 4:2:1
+    assert 1.7 < counts[0] / counts[1] < 2.3
+    assert 1.7 < counts[1] / counts[2] < 2.3
+    
+    # 序列化往返后结果一致
+    restored = AliasTable.from_dict(table.to_dict())
+    assert list(restored.prob) == list(table.prob)
+    assert list(restored.alias) == list(table.alias)
+
+
+def _random_weight_vectors(count, seed=0):
+    """生成随机权重向量 (长度 1-20, 取值 1-1000)"""
+    rng = random.Random(seed)
+    return [
+        [rng.randint(1, 1000) for _ in range(rng.randint(1, 20))]
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "weights",
+    [[9, 7, 1], [1], [1, 1000], [5, 5, 5], [3, 0, 1], [1, 2, 3, 4, 5, 6, 7]]
+    + _random_weight_vectors(50)
+)
+def test_alias_table_exact_probabilities(weights):
+    """测试别名表编码的概率与权重完全一致 (不依赖抽样误差)"""
+    table = AliasTable.build(weights)
+    n = len(weights)
+    total = sum(weights)
+    
+    if table.uniform:
+        implied = [1.0 / n] * n
+    else:
+        # 第 i 列以 prob[i] 保留自身, 否则转给 alias[i]
+        implied = [0.0] * n
+        for i in range(n):
+            implied[i] += table.prob[i] / n
+            implied[table.alias[i]] += (1.0 - table.prob[i]) / n
+    
+    for p, w in zip(implied, weights):
+        assert p == pytest.approx(w / total, abs=1e-9)
+
+
+@pytest.mark.unit
+def test_provider_error_classification():
+    """测试提供商错误分类"""
+    import httpx
+    from app.providers.exceptions import (
+        MAX_REASON_LENGTH,
+        ProviderFatalError,
+        ProviderRetryableError,
+        to_provider_error
+    )
+    
+    request = httpx.Request("POST", "https://example.com/chat/completions")
+    
+    def status_error(code):
+        response = httpx.Response(code, request=request)
+        return httpx.HTTPStatusError(f"HTTP {code}", request=request, response=response)
+    
+    # 客户端错误不重试，服务端错误可重试
+    assert isinstance(to_provider_error(status_error(401)), ProviderFatalError)
+    assert isinstance(to_provider_error(status_error(503)), ProviderRetryableError)
+    assert to_provider_error(status_error(503)).code == "http_503"
+    assert to_provider_error(httpx.ReadTimeout("timed out")).code == "timeout"
+    
+    # 错误原因被截断
+    error = to_provider_error(ValueError("x" * 1000))
+    assert len(error.short_reason) == MAX_REASON_LENGTH
+
+
+@pytest.mark.unit
+def test_token_estimator_character_classes():
+    """测试令牌估算的字符分类"""
+    from app.services.token_estimator import TokenEstimator
+    
+    # 英文约 4 字符 = 1 token，中文约 1.5 字符 = 1 token
+    assert TokenEstimator.estimate_completion_tokens("a" * 400) == 100
+    assert TokenEstimator.estimate_completion_tokens("你" * 150) == 100
+    
+    # 按消息内容估算，而不是按字符总数的字符串
+    messages = [{"role": "user", "content": "你" * 150}]
+    assert TokenEstimator.estimate_messages_tokens(messages) == 110